@@ -0,0 +1,175 @@
+# api/audit_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+SECURITY_AUDIT_DB = os.getenv("SECURITY_AUDIT_DB", "./security_audit.db")  # empty disables the store
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS security_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    level TEXT NOT NULL,
+    endpoint TEXT,
+    wallet_address TEXT,
+    tx_hash TEXT,
+    value REAL,
+    success INTEGER,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_security_events_wallet_ts ON security_events (wallet_address, ts);
+CREATE INDEX IF NOT EXISTS ix_security_events_endpoint_ts ON security_events (endpoint, ts);
+CREATE INDEX IF NOT EXISTS ix_security_events_tx_hash ON security_events (tx_hash);
+CREATE INDEX IF NOT EXISTS ix_security_events_ts ON security_events (ts);
+CREATE TRIGGER IF NOT EXISTS security_events_no_update BEFORE UPDATE ON security_events
+BEGIN SELECT RAISE(ABORT, 'security_events is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS security_events_no_delete BEFORE DELETE ON security_events
+BEGIN SELECT RAISE(ABORT, 'security_events is append-only'); END;
+"""
+
+_INSERT = """
+INSERT INTO security_events (ts, event_type, level, endpoint, wallet_address, tx_hash, value, success, payload)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+class SecurityAuditStore:
+    """Append-only SQLite store for security events with indexed lookups"""
+
+    def __init__(self, path: str = SECURITY_AUDIT_DB):
+        self.path = path
+        self.closed = False
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row(record: logging.LogRecord) -> tuple:
+        event = getattr(record, "event", None) or {"message": record.getMessage()}
+        wallet = event.get("wallet_address")
+        success = event.get("validation_success", event.get("transaction_success"))
+        return (
+            record.created,
+            str(record.msg),
+            record.levelname,
+            event.get("endpoint"),
+            wallet.lower() if isinstance(wallet, str) else None,
+            event.get("tx_hash"),
+            event.get("value"),
+            None if success is None else int(bool(success)),
+            json.dumps(event, default=str),
+        )
+
+    def write_batch(self, records: List[logging.LogRecord]):
+        """Insert a batch of records in a single transaction"""
+        rows = [self._row(record) for record in records]
+        with self._write_lock, self._writer:
+            self._writer.executemany(_INSERT, rows)
+
+    def query(
+        self,
+        wallet_address: Optional[str] = None,
+        endpoint: Optional[str] = None,
+        tx_hash: Optional[str] = None,
+        event_type: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        limit: int = 100,
+        before_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return matching events, newest first by insertion order. ts comes from
+        the producer and can disagree with id order under batched writes, so
+        id alone is both the sort key and the before_id cursor.
+        """
+        clauses, params = [], []
+        if wallet_address:
+            clauses.append("wallet_address = ?")
+            params.append(wallet_address.lower())
+        if endpoint:
+            clauses.append("endpoint = ?")
+            params.append(endpoint)
+        if tx_hash:
+            clauses.append("tx_hash = ?")
+            params.append(tx_hash)
+        if event_type:
+            clauses.append("event_type = ?")
+            params.append(event_type)
+        if since:
+            clauses.append("ts >= ?")
+            params.append(since.timestamp())
+        if until:
+            clauses.append("ts < ?")
+            params.append(until.timestamp())
+        if before_id:
+            clauses.append("id < ?")
+            params.append(before_id)
+
+        sql = "SELECT id, ts, event_type, level, payload FROM security_events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+        return [
+            {
+                "id": row["id"],
+                "timestamp": datetime.fromtimestamp(row["ts"], tz=timezone.utc).isoformat(),
+                "event_type": row["event_type"],
+                "level": row["level"],
+                **json.loads(row["payload"]),
+            }
+            for row in rows
+        ]
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+            self.closed = True
+
+class AuditStoreHandler(logging.Handler):
+    """Logging handler that persists security records to a SecurityAuditStore in batches"""
+
+    def __init__(self, store: SecurityAuditStore):
+        super().__init__()
+        self.store = store
+
+    def emit(self, record: logging.LogRecord):
+        self.emit_batch([record])
+
+    def emit_batch(self, records: List[logging.LogRecord]):
+        self.store.write_batch(records)
+
+    def close(self):
+        self.store.close()
+        super().close()
+
+_store: Optional[SecurityAuditStore] = None
+_store_lock = threading.Lock()
+
+def get_audit_store() -> Optional[SecurityAuditStore]:
+    """Shared store for this process, or None when SECURITY_AUDIT_DB is empty"""
+    global _store
+    if not SECURITY_AUDIT_DB:
+        return None
+    with _store_lock:
+        if _store is None or _store.closed:
+            _store = SecurityAuditStore(SECURITY_AUDIT_DB)
+        return _store
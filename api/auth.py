@@ -1,7 +1,8 @@
 from fastapi import Header, HTTPException, Security, Depends
 from fastapi.security.api_key import APIKeyHeader
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 import os
 from dotenv import load_dotenv
 from enum import Enum
@@ -10,7 +11,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 
 from api.models.tokens import OAuthToken
-from api.database import get_db
+from api.database import get_async_db, get_async_read_db, AsyncSessionLocal, DATABASE_REPLICA_URLS
 
 load_dotenv()
 
@@ -61,7 +62,7 @@ async def get_api_key_with_tier(api_key: str = Security(api_key_header)):
 
 async def validate_oauth_token(
     credentials: HTTPAuthorizationCredentials = Security(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> Dict[str, Any]:
     """Validate OAuth2.0 bearer token and return user context"""
     if not credentials:
@@ -73,10 +74,16 @@ async def validate_oauth_token(
     
     token = credentials.credentials
     
-    oauth_token = db.query(OAuthToken).filter(
+    query = select(OAuthToken).where(
         OAuthToken.access_token == token,
         OAuthToken.expires_at > datetime.utcnow()
-    ).first()
+    ).limit(1)
+    oauth_token = (await db.execute(query)).scalars().first()
+
+    if not oauth_token and DATABASE_REPLICA_URLS:
+        # A token issued moments ago may not have reached the replica yet
+        async with AsyncSessionLocal() as primary:
+            oauth_token = (await primary.execute(query)).scalars().first()
     
     if not oauth_token:
         raise HTTPException(
@@ -95,10 +102,10 @@ async def validate_oauth_token(
 
 async def refresh_oauth_token(
     token_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> Dict[str, Any]:
     """Refresh an expired OAuth2.0 token using refresh token"""
-    oauth_token = db.query(OAuthToken).filter(OAuthToken.id == token_id).first()
+    oauth_token = await db.get(OAuthToken, token_id)
     
     if not oauth_token or not oauth_token.refresh_token:
         raise HTTPException(
@@ -116,7 +123,7 @@ async def refresh_oauth_token(
     
     try:
         provider = OAUTH_PROVIDERS[oauth_token.provider]
-        new_tokens = provider.refresh_token(oauth_token.refresh_token)
+        new_tokens = await provider.refresh_token(oauth_token.refresh_token)
         
         oauth_token.access_token = new_tokens["access_token"]
         oauth_token.expires_at = datetime.utcnow() + timedelta(seconds=new_tokens.get("expires_in", 3600))
@@ -124,8 +131,7 @@ async def refresh_oauth_token(
         if "refresh_token" in new_tokens:
             oauth_token.refresh_token = new_tokens["refresh_token"]
         
-        db.commit()
-        db.refresh(oauth_token)
+        await db.commit()
         
         return {
             "access_token": oauth_token.access_token,
@@ -142,7 +148,7 @@ async def refresh_oauth_token(
 async def get_current_user(
     api_key: Optional[str] = Security(api_key_header),
     oauth_credentials: Optional[HTTPAuthorizationCredentials] = Security(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ) -> Dict[str, Any]:
     """Unified authentication supporting both API keys and OAuth2.0 tokens"""
     
@@ -168,6 +174,20 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
 
+# Key the poller presents to the batch submission endpoint; it must also be listed in API_KEYS
+POLLER_API_KEY = os.getenv("POLLER_API_KEY")
+
+def require_batch_submitter(user: Dict[str, Any] = Depends(get_current_user)):
+    """Batch reward submission is limited to the poller's API key and admin callers"""
+    if OAuthScope.ADMIN in user.get("scopes", []):
+        return user
+    if POLLER_API_KEY and user.get("api_key") == POLLER_API_KEY:
+        return user
+    raise HTTPException(
+        status_code=403,
+        detail="Insufficient permissions: admin scope or the poller API key required"
+    )
+
 def require_scope(required_scope: OAuthScope):
     """Decorator to require specific OAuth2.0 scope"""
     def scope_dependency(user: Dict[str, Any] = Depends(get_current_user)):
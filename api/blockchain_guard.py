@@ -1,60 +1,93 @@
 from functools import wraps
 from fastapi import HTTPException
 from api.validation import BaseActivitySubmission
-import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+import threading
+
+# Internal invariant, not a security boundary: any module could import this
+# sentinel. It only catches accidental construction of a ValidatedActivity
+# outside the guard; the real gate is that every API path goes through it.
+_ISSUER = object()
+
+@dataclass(frozen=True)
+class ValidatedActivity:
+    """
+    Immutable proof that an activity passed the validation pipeline.
+    The chain layer (api.rewards) refuses to build transactions without one.
+    """
+    wallet_address: str
+    activity_type: str
+    value: float
+    score: int
+    _issuer: object = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self):
+        if self._issuer is not _ISSUER:
+            raise TypeError("ValidatedActivity can only be issued by BlockchainGuard")
+
+class GuardMetrics:
+    """Thread-safe counters describing blockchain guard decisions"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"validated": 0, "authorized": 0, "blocked": 0}
+
+    def incr(self, key: str):
+        with self._lock:
+            self._counts[key] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+guard_metrics = GuardMetrics()
 
 class BlockchainGuard:
     """
-    A more robust validation guard that prevents blockchain execution
-    by using a context manager approach with explicit validation gates
+    Single validation gate in front of blockchain execution. Pydantic has already
+    enforced the request model; the guard issues the ValidatedActivity token that
+    the chain layer requires.
     """
-    
+
     def __init__(self):
-        self.validation_passed = False
-        self.blockchain_allowed = False
-    
-    def validate_activity(self, activity: BaseActivitySubmission):
-        """Explicit validation that must pass before blockchain operations"""
-        if activity.value > 10000:
-            raise HTTPException(status_code=422, detail="Activity value cannot exceed 10000 kWh")
-        if activity.value < 0:
-            raise HTTPException(status_code=422, detail="Activity value must be non-negative")
-        
-        self.validation_passed = True
-        self.blockchain_allowed = True
-        return True
-    
-    def allow_blockchain(self):
-        """Check if blockchain operations are allowed"""
-        if not self.validation_passed or not self.blockchain_allowed:
+        self.validated: Optional[ValidatedActivity] = None
+
+    def validate_activity(self, activity: BaseActivitySubmission) -> ValidatedActivity:
+        """Issue the validated activity token; the request model has already enforced the value range"""
+        self.validated = ValidatedActivity(
+            wallet_address=activity.wallet_address,
+            activity_type=activity.activity_type,
+            value=activity.value,
+            score=int(activity.value * 100),
+            _issuer=_ISSUER,
+        )
+        guard_metrics.incr("validated")
+        return self.validated
+
+    def allow_blockchain(self) -> ValidatedActivity:
+        """Return the validated activity token if blockchain operations are allowed"""
+        if self.validated is None:
+            guard_metrics.incr("blocked")
             raise HTTPException(status_code=422, detail="Blockchain operations not authorized - validation failed")
-        return True
+        guard_metrics.incr("authorized")
+        return self.validated
 
 def blockchain_protected(func):
     """
-    Decorator that creates a blockchain guard and passes it to the function
-    The function must explicitly validate and authorize blockchain operations
+    Decorator that creates a blockchain guard and passes it to the function.
+    FastAPI always calls endpoints with keyword arguments, so the submission is
+    read from the ``activity`` parameter directly.
     """
     @wraps(func)
     async def wrapper(*args, **kwargs):
         guard = BlockchainGuard()
-        
-        activity = None
-        for arg in args:
-            if isinstance(arg, BaseActivitySubmission):
-                activity = arg
-                break
-        
-        if not activity:
-            for key, value in kwargs.items():
-                if isinstance(value, BaseActivitySubmission):
-                    activity = value
-                    break
-        
-        if activity:
+
+        activity = kwargs.get('activity')
+        if activity is not None:
             guard.validate_activity(activity)
-        
+
         kwargs['guard'] = guard
         return await func(*args, **kwargs)
-    
+
     return wrapper
@@ -1,22 +1,209 @@
 # api/database.py
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.dml import UpdateBase
+from contextvars import ContextVar
+from typing import Optional
 import os
+import random
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")  # derived from DATABASE_URL when unset
+# Optional comma-separated read replicas; read-only sessions are routed to them
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
 
-engine = create_engine(
-    DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+# Connection pool settings (QueuePool for Postgres and file-backed SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite pragmas applied to every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+
+_SQLITE_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+_SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+def validate_database_settings():
+    """Reject invalid engine settings before the engine is created"""
+    if DB_POOL_SIZE < 1:
+        raise ValueError("DB_POOL_SIZE must be at least 1")
+    if DB_MAX_OVERFLOW < 0:
+        raise ValueError("DB_MAX_OVERFLOW must be non-negative")
+    if DB_POOL_TIMEOUT <= 0:
+        raise ValueError("DB_POOL_TIMEOUT must be positive")
+    if SQLITE_JOURNAL_MODE not in _SQLITE_JOURNAL_MODES:
+        raise ValueError(f"SQLITE_JOURNAL_MODE must be one of: {', '.join(sorted(_SQLITE_JOURNAL_MODES))}")
+    if SQLITE_SYNCHRONOUS not in _SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of: {', '.join(sorted(_SQLITE_SYNCHRONOUS_MODES))}")
+    if SQLITE_BUSY_TIMEOUT_MS < 0 or SQLITE_MMAP_SIZE < 0:
+        raise ValueError("SQLITE_BUSY_TIMEOUT_MS and SQLITE_MMAP_SIZE must be non-negative")
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _is_memory_sqlite(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+def async_database_url(url: str) -> str:
+    """Swap the sync driver in a database URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    return url
+
+def engine_options(url: str) -> dict:
+    """create_engine keyword arguments for the configured pool and driver"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING}
+    if is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if _is_memory_sqlite(url):
+            # A private in-memory database only exists on a single connection
+            options["poolclass"] = StaticPool
+            return options
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+    )
+    return options
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+validate_database_settings()
+
+# Per-request flag shared by every session in the request: once anything is
+# written, later reads in the same request go to the primary (read-your-writes)
+_request_scope: ContextVar[Optional[dict]] = ContextVar("db_request_scope", default=None)
+
+def begin_request_scope():
+    return _request_scope.set({"wrote": False})
+
+def end_request_scope(token):
+    _request_scope.reset(token)
+
+def _mark_write(session: Session):
+    session.info["wrote"] = True
+    scope = _request_scope.get()
+    if scope is not None:
+        scope["wrote"] = True
+
+class RoutingSession(Session):
+    """
+    Session that sends reads from read-only sessions to a replica and
+    everything else, including any read after a write, to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if isinstance(clause, UpdateBase) or self._flushing:
+            _mark_write(self)
+            return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+        replicas = self.info.get("replicas")
+        if self.info.get("read_only") and replicas and not self.info.get("wrote"):
+            scope = _request_scope.get()
+            if scope is None or not scope["wrote"]:
+                return random.choice(replicas)
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+@event.listens_for(RoutingSession, "after_flush")
+def _pin_after_flush(session, flush_context):
+    _mark_write(session)
+
+def _create_engine(url: str):
+    sync_engine = create_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(sync_engine, "connect", apply_sqlite_pragmas)
+    return sync_engine
+
+def _create_async_engine(url: str):
+    engine_ = create_async_engine(url, **engine_options(url))
+    if is_sqlite(url):
+        event.listen(engine_.sync_engine, "connect", apply_sqlite_pragmas)
+    return engine_
+
+engine = _create_engine(DATABASE_URL)
+replica_engines = [_create_engine(url) for url in DATABASE_REPLICA_URLS]
+
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False, bind=engine)
+# Read-only sessions: auth lookups, token listing and polling scans
+ReadSessionLocal = sessionmaker(
+    class_=RoutingSession, autocommit=False, autoflush=False, bind=engine,
+    info={"read_only": True, "replicas": replica_engines},
+)
+
+# Async engine for request-path queries (auth lookups); SessionLocal remains for scripts and the poller
+ASYNC_DATABASE_URL = ASYNC_DATABASE_URL or async_database_url(DATABASE_URL)
+async_engine = _create_async_engine(ASYNC_DATABASE_URL)
+async_replica_engines = [_create_async_engine(async_database_url(url)) for url in DATABASE_REPLICA_URLS]
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+    autoflush=False, expire_on_commit=False,
+)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, sync_session_class=RoutingSession,
+    autoflush=False, expire_on_commit=False,
+    info={"read_only": True, "replicas": [replica.sync_engine for replica in async_replica_engines]},
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+def check_database_connection():
+    """Startup check: connect to the primary and every replica, and confirm the SQLite pragmas took effect"""
+    for engine_ in [engine, *replica_engines]:
+        url = engine_.url.render_as_string(hide_password=False)
+        with engine_.connect() as conn:
+            if is_sqlite(url) and not _is_memory_sqlite(url):
+                journal_mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+                if journal_mode.upper() != SQLITE_JOURNAL_MODE:
+                    raise RuntimeError(f"SQLite journal_mode is {journal_mode}, expected {SQLITE_JOURNAL_MODE}")
+            else:
+                conn.execute(text("SELECT 1"))
+
 def get_db():
     db: Session = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_read_db():
+    db: Session = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
+async def dispose_async_engines():
+    """Drop pooled async connections, e.g. before the owning event loop closes"""
+    for engine_ in [async_engine, *async_replica_engines]:
+        await engine_.dispose()
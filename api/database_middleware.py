@@ -0,0 +1,21 @@
+from api.database import begin_request_scope, end_request_scope
+
+class DatabaseScopeMiddleware:
+    """
+    Opens a per-request database scope so that reads issued after a write in
+    the same request are routed to the primary instead of a replica.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = begin_request_scope()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_request_scope(token)
@@ -0,0 +1,88 @@
+# energy/cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+ENERGY_CACHE_DB = os.getenv("ENERGY_CACHE_DB", "./energy_cache.db")  # empty disables the cache
+ENERGY_CACHE_MAX_AGE = int(os.getenv("ENERGY_CACHE_MAX_AGE", str(35 * 24 * 3600)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS provider_responses (
+    key TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    final INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_provider_responses_fetched_at ON provider_responses (fetched_at);
+"""
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    final: bool
+    body: Any
+
+class ProviderResponseCache:
+    """
+    On-disk cache of provider API responses keyed by request (e.g. site and
+    date window). Final responses cover a closed window and are served without
+    a request; others are revalidated with ETag / If-Modified-Since.
+    """
+
+    def __init__(self, path: str = ENERGY_CACHE_DB, max_age: int = ENERGY_CACHE_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.prune()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, final, body FROM provider_responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return CachedResponse(row[0], row[1], bool(row[2]), json.loads(row[3]))
+
+    def put(self, key: str, body: Any, etag: Optional[str] = None,
+            last_modified: Optional[str] = None, final: bool = False):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO provider_responses (key, etag, last_modified, final, fetched_at, body) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, int(final), time.time(), json.dumps(body)),
+            )
+
+    def prune(self) -> int:
+        """Drop entries older than max_age; returns the number removed"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "DELETE FROM provider_responses WHERE fetched_at < ?", (time.time() - self.max_age,)
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[ProviderResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> Optional[ProviderResponseCache]:
+    """Shared cache for this process, or None when ENERGY_CACHE_DB is empty"""
+    global _cache
+    if not ENERGY_CACHE_DB:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ProviderResponseCache(ENERGY_CACHE_DB)
+        return _cache
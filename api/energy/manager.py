@@ -0,0 +1,50 @@
+# energy/manager.py
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import httpx
+
+DATA_PROVIDERS = {}
+
+def register_data_provider(name):
+    def wrapper(cls):
+        DATA_PROVIDERS[name] = cls()
+        return cls
+    return wrapper
+
+class Reading(NamedTuple):
+    """Energy produced in (period_start, period_end], newer than the token's watermark"""
+    kwh: float
+    period_start: datetime
+    period_end: datetime
+    cursor: Optional[str] = None
+
+class EnergyDataProvider(ABC):
+    @abstractmethod
+    async def fetch_reading(
+        self,
+        client: httpx.AsyncClient,
+        access_token: str,
+        since: Optional[datetime],
+        cursor: Optional[str],
+        timeout: float,
+    ) -> Optional[Reading]:
+        """
+        Fetch the energy produced after `since` for the account behind an access token.
+
+        Args:
+            client: Shared keep-alive HTTP client
+            access_token: OAuth access token for the provider account
+            since: Watermark of the last submitted reading (UTC), or None on the first poll
+            cursor: Provider cursor saved with the watermark
+            timeout: Per-request timeout in seconds
+
+        Returns:
+            A Reading with the new energy, or None when there is nothing new yet.
+            HTTP errors are raised as httpx.HTTPStatusError so the poller can back off.
+        """
+        pass
+
+def get_data_provider(name: str) -> Optional[EnergyDataProvider]:
+    return DATA_PROVIDERS.get(name)
@@ -0,0 +1,153 @@
+# energy/solaredge.py
+import asyncio
+import hashlib
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import httpx
+
+from api.energy.cache import get_response_cache
+from api.energy.manager import EnergyDataProvider, Reading, register_data_provider
+
+SOLAREDGE_API_URL = os.getenv("SOLAREDGE_API_URL", "https://monitoringapi.solaredge.com").rstrip("/")
+# The energy endpoint accepts at most one month per request at quarter-hour resolution
+SOLAREDGE_MAX_WINDOW_DAYS = int(os.getenv("SOLAREDGE_MAX_WINDOW_DAYS", "28"))
+SOLAREDGE_INITIAL_LOOKBACK = timedelta(hours=int(os.getenv("SOLAREDGE_INITIAL_LOOKBACK_HOURS", "24")))
+# Inverters upload with a delay, so the newest quarters are left for the next poll
+SOLAREDGE_REPORTING_DELAY = timedelta(minutes=int(os.getenv("SOLAREDGE_REPORTING_DELAY_MINUTES", "30")))
+SOLAREDGE_SITES_PAGE_SIZE = 100
+# How long the site list kept in the cursor is trusted before sites added to the account are picked up
+SOLAREDGE_SITES_TTL = timedelta(hours=float(os.getenv("SOLAREDGE_SITES_TTL_HOURS", "24")))
+
+QUARTER = timedelta(minutes=15)
+_UNIT_TO_KWH = {"Wh": 0.001, "kWh": 1.0, "MWh": 1000.0}
+
+def _zone(name: Optional[str]):
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except ZoneInfoNotFoundError:
+        return timezone.utc
+
+def _floor_to_quarter(moment: datetime) -> datetime:
+    return moment.replace(minute=moment.minute - moment.minute % 15, second=0, microsecond=0)
+
+@register_data_provider("solaredge")
+class SolarEdgeEnergyData(EnergyDataProvider):
+    """
+    Energy readings from the SolarEdge monitoring API. The account's sites are
+    listed page by page and kept in the watermark cursor, and listed again
+    once older than SOLAREDGE_SITES_TTL; energy is then read
+    per site in date windows at quarter-hour resolution. Responses are cached
+    on disk, closed windows are never refetched and open ones are revalidated
+    with ETag / If-Modified-Since.
+    """
+
+    def __init__(self, base_url: str = SOLAREDGE_API_URL):
+        self.base_url = base_url
+
+    async def _get(self, client: httpx.AsyncClient, access_token: str, path: str, params: Dict[str, Any],
+                   timeout: float, cache_key: str, final: bool = False) -> Any:
+        cache = get_response_cache()
+        cached = await asyncio.to_thread(cache.get, cache_key) if cache is not None else None
+        if cached is not None and cached.final:
+            return cached.body
+
+        headers = {"Authorization": f"Bearer {access_token}", "Accept": "application/json"}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        response = await client.get(f"{self.base_url}{path}", params=params, headers=headers, timeout=timeout)
+        if response.status_code == 304 and cached is not None:
+            if final:
+                await asyncio.to_thread(cache.put, cache_key, cached.body, cached.etag, cached.last_modified, True)
+            return cached.body
+        response.raise_for_status()
+
+        body = response.json()
+        if cache is not None:
+            await asyncio.to_thread(
+                cache.put, cache_key, body,
+                response.headers.get("ETag"), response.headers.get("Last-Modified"), final,
+            )
+        return body
+
+    async def list_sites(self, client: httpx.AsyncClient, access_token: str, timeout: float) -> List[Dict[str, Any]]:
+        """Every site on the account as {"id", "tz"}"""
+        account = hashlib.sha256(access_token.encode()).hexdigest()[:16]
+        sites, start_index = [], 0
+        while True:
+            body = await self._get(
+                client, access_token, "/sites/list",
+                {"size": SOLAREDGE_SITES_PAGE_SIZE, "startIndex": start_index}, timeout,
+                cache_key=f"solaredge:sites:{account}:{start_index}",
+            )
+            page = body["sites"]["site"]
+            sites.extend(
+                {"id": site["id"], "tz": (site.get("location") or {}).get("timeZone")}
+                for site in page
+            )
+            start_index += len(page)
+            if not page or start_index >= body["sites"]["count"]:
+                return sites
+
+    async def site_energy_kwh(self, client: httpx.AsyncClient, access_token: str, site: Dict[str, Any],
+                              start: datetime, end: datetime, timeout: float) -> float:
+        """Energy of the quarters within (start, end] UTC for one site"""
+        zone = _zone(site.get("tz"))
+        first_day = start.replace(tzinfo=timezone.utc).astimezone(zone).date()
+        last_day = end.replace(tzinfo=timezone.utc).astimezone(zone).date()
+        # Windows ending before yesterday (site time) are complete and cached for good
+        today = datetime.now(zone).date()
+
+        total = 0.0
+        day = first_day
+        while day <= last_day:
+            window_end: date = min(day + timedelta(days=SOLAREDGE_MAX_WINDOW_DAYS - 1), last_day)
+            body = await self._get(
+                client, access_token, f"/site/{site['id']}/energy",
+                {"timeUnit": "QUARTER_OF_AN_HOUR", "startDate": day.isoformat(), "endDate": window_end.isoformat()},
+                timeout,
+                cache_key=f"solaredge:energy:{site['id']}:{day.isoformat()}:{window_end.isoformat()}",
+                final=window_end < today - timedelta(days=1),
+            )
+            energy = body["energy"]
+            scale = _UNIT_TO_KWH.get(energy.get("unit", "Wh"), 0.001)
+            for value in energy["values"]:
+                if value.get("value") is None:
+                    continue
+                quarter_start = (
+                    datetime.strptime(value["date"], "%Y-%m-%d %H:%M:%S")
+                    .replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None)
+                )
+                if start <= quarter_start and quarter_start + QUARTER <= end:
+                    total += value["value"] * scale
+            day = window_end + timedelta(days=1)
+        return total
+
+    async def fetch_reading(self, client, access_token, since, cursor, timeout) -> Optional[Reading]:
+        end = _floor_to_quarter(datetime.utcnow() - SOLAREDGE_REPORTING_DELAY)
+        start = since or end - SOLAREDGE_INITIAL_LOOKBACK
+        if end <= start:
+            return None
+
+        now = datetime.utcnow()
+        state = json.loads(cursor) if cursor else None
+        # Cursors written before the TTL existed hold a bare site list and count as stale
+        if isinstance(state, dict) and now - datetime.fromisoformat(state["fetched_at"]) < SOLAREDGE_SITES_TTL:
+            sites, fetched_at = state["sites"], state["fetched_at"]
+        else:
+            sites, fetched_at = await self.list_sites(client, access_token, timeout), now.isoformat()
+        if not sites:
+            return None
+
+        kwh = 0.0
+        for site in sites:
+            kwh += await self.site_energy_kwh(client, access_token, site, start, end, timeout)
+        return Reading(kwh=round(kwh, 3), period_start=start, period_end=end,
+                       cursor=json.dumps({"sites": sites, "fetched_at": fetched_at}))
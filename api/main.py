@@ -1,13 +1,23 @@
 from fastapi import FastAPI, Request
-from api.routes import devices, activities, wallets, activity_types, healthz, oauth_routes
+from api.routes import devices, activities, wallets, activity_types, healthz, oauth_routes, audit
 from api.routes.v1 import activities as v1_activities
 from api.routes.v2 import activities as v2_activities
-from api.oauth import github 
-from api.database import engine, Base
-from api.models import tokens
+from api.oauth import github, solaredge
+from api.database import engine, Base, check_database_connection
+from api.models import (
+    tokens, poll_watermark, poller_lease, poll_schedule, poll_outbox, token_refresh_state, token_archive,
+)
 from api.rate_limiting import limiter
 from api.security_middleware import SecurityMiddleware
 from api.auth_middleware import AuthContextMiddleware
+from api.database_middleware import DatabaseScopeMiddleware
+from api.security_logging import start_security_logging, stop_security_logging
+from api.submission import start_submission_queue, stop_submission_queue
+from api.poll_scheduler import start_poll_scheduler, stop_poll_scheduler
+from api.http_client import close_async_client
+from api.token_store import ensure_token_indexes
+from api.token_refresh import start_token_refresher, stop_token_refresher
+from api.token_purge import start_token_purge, stop_token_purge
 
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.middleware import SlowAPIMiddleware
@@ -22,6 +32,8 @@ app.add_middleware(AuthContextMiddleware)
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 app.add_middleware(SlowAPIMiddleware)
+# Outermost, so the read-your-writes scope covers every other middleware
+app.add_middleware(DatabaseScopeMiddleware)
 
 # Create tables if they don’t exist
 Base.metadata.create_all(bind=engine)
@@ -37,9 +49,56 @@ app.include_router(oauth_routes.router, prefix="/oauth", tags=["OAuth"])
 app.include_router(wallets.router, tags=["Wallets"])
 app.include_router(activity_types.router, tags=["Activity Types"])
 app.include_router(healthz.router)
+app.include_router(audit.router, prefix="/admin")
 
 # For dev db intialization, will be removed for production
 @app.on_event("startup")
 def init_db():
     from api.models import tokens
+    check_database_connection()
     tokens.Base.metadata.create_all(bind=engine)
+    ensure_token_indexes()
+
+@app.on_event("startup")
+def init_security_logging():
+    start_security_logging()
+
+@app.on_event("startup")
+async def init_submission_queue():
+    await start_submission_queue()
+
+@app.on_event("startup")
+async def init_poll_scheduler():
+    await start_poll_scheduler()
+
+@app.on_event("startup")
+async def init_token_refresher():
+    await start_token_refresher()
+
+@app.on_event("startup")
+async def init_token_purge():
+    await start_token_purge()
+
+@app.on_event("shutdown")
+async def finish_token_refresher():
+    await stop_token_refresher()
+
+@app.on_event("shutdown")
+async def finish_token_purge():
+    await stop_token_purge()
+
+@app.on_event("shutdown")
+async def finish_poll_scheduler():
+    await stop_poll_scheduler()
+
+@app.on_event("shutdown")
+async def drain_submission_queue():
+    await stop_submission_queue()
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await close_async_client()
+
+@app.on_event("shutdown")
+def flush_security_logging():
+    stop_security_logging()
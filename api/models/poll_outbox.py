@@ -0,0 +1,16 @@
+# api/models/poll_outbox.py
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime
+from api.database import Base
+
+class PollOutbox(Base):
+    """Readings whose watermark the poller has claimed but whose reward has not been sent yet"""
+    __tablename__ = "poll_outbox"
+
+    idempotency_key = Column(String, primary_key=True)
+    # No foreign key: a reward that is owed survives the token being purged or compacted
+    token_id = Column(Integer, nullable=False)
+    payload = Column(Text, nullable=False)  # activity JSON exactly as first submitted
+    attempts = Column(Integer, nullable=False, default=1)
+    next_attempt_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
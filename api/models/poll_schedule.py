@@ -0,0 +1,17 @@
+# api/models/poll_schedule.py
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from datetime import datetime
+from api.database import Base
+
+class PollSchedule(Base):
+    """Per-token polling cadence: when the token is next due and the adaptive interval behind it"""
+    __tablename__ = "poll_schedules"
+
+    token_id = Column(Integer, ForeignKey("oauth_tokens.id", ondelete="CASCADE"), primary_key=True)
+    next_poll_at = Column(DateTime, nullable=False, index=True)
+    interval_seconds = Column(Float, nullable=False)
+    # Pins this token to a fixed interval instead of the adaptive one
+    interval_override = Column(Float)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    last_outcome = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
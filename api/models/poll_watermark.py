@@ -0,0 +1,14 @@
+# api/models/poll_watermark.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from api.database import Base
+
+class PollWatermark(Base):
+    """Per-token polling progress: the newest reading already submitted"""
+    __tablename__ = "poll_watermarks"
+
+    token_id = Column(Integer, ForeignKey("oauth_tokens.id", ondelete="CASCADE"), primary_key=True)
+    last_reading_at = Column(DateTime, nullable=False)
+    provider_cursor = Column(String)
+    last_success_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,20 @@
+# api/models/poller_lease.py
+from sqlalchemy import Column, Integer, String, DateTime
+from api.database import Base
+
+class PollerLease(Base):
+    """Ownership of one token shard by a poller worker, valid until expires_at"""
+    __tablename__ = "poller_leases"
+
+    shard_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    heartbeat_at = Column(DateTime, nullable=False)
+
+class PollerWorker(Base):
+    """Membership row for a live poller, so workers without shards still count towards the fair share"""
+    __tablename__ = "poller_workers"
+
+    worker_id = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    heartbeat_at = Column(DateTime, nullable=False)
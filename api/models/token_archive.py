@@ -0,0 +1,15 @@
+# api/models/token_archive.py
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from api.database import Base
+
+class ArchivedToken(Base):
+    """Wallet links removed by the purge job; the credentials themselves are not kept"""
+    __tablename__ = "oauth_tokens_archive"
+
+    id = Column(Integer, primary_key=True)
+    wallet_address = Column(String, index=True)
+    provider = Column(String)
+    expires_at = Column(DateTime)
+    created_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,14 @@
+# api/models/token_refresh_state.py
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from datetime import datetime
+from api.database import Base
+
+class TokenRefreshState(Base):
+    """Failed background refreshes of a token, so retries back off instead of hammering the provider"""
+    __tablename__ = "token_refresh_state"
+
+    token_id = Column(Integer, ForeignKey("oauth_tokens.id", ondelete="CASCADE"), primary_key=True)
+    consecutive_failures = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, index=True)
+    last_error = Column(String)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
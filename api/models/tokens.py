@@ -1,15 +1,20 @@
 # api/models/token.py
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index
 from datetime import datetime
 from api.database import Base
 
 class OAuthToken(Base):
     __tablename__ = "oauth_tokens"
+    __table_args__ = (
+        # One link per wallet and provider; databases created before this index
+        # need `python token_maintenance.py compact` to collapse duplicates first
+        Index("uq_oauth_tokens_wallet_provider", "wallet_address", "provider", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     wallet_address = Column(String, index=True)
     provider = Column(String, index=True)
     access_token = Column(String)
     refresh_token = Column(String)
-    expires_at = Column(DateTime)
+    expires_at = Column(DateTime, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -1,16 +1,98 @@
 # oauth/manager.py
+import asyncio
+import base64
+import hashlib
+import os
+import secrets
 from abc import ABC, abstractmethod
-from typing import Dict
+from typing import Dict, Optional
+
+import httpx
+
+from api.http_client import get_async_client
+from api.oauth.state_store import OAuthStateStore, get_state_store
+
+OAUTH_HTTP_TIMEOUT = float(os.getenv("OAUTH_HTTP_TIMEOUT", "10"))
+OAUTH_HTTP_RETRIES = int(os.getenv("OAUTH_HTTP_RETRIES", "2"))
+# Responses that say the provider turned the request away unprocessed, so resending
+# is safe even though authorization codes and rotating refresh tokens are single use.
+# A 502/504 comes from a gateway: the provider may already have spent the code or
+# rotated the refresh token, so those fail now and the refresh backoff retries later.
+_RETRY_STATUSES = {429, 503}
 
 OAUTH_PROVIDERS = {}
 
 def register_provider(name):
     def wrapper(cls):
-        OAUTH_PROVIDERS[name] = cls()
+        provider = cls()
+        provider.name = name
+        provider.state_store = get_state_store()
+        OAUTH_PROVIDERS[name] = provider
         return cls
     return wrapper
 
 class OAuthProvider(ABC):
+    # Set by register_provider; pending logins live in the shared store so a
+    # callback can land on any worker
+    name: str = None
+    state_store: OAuthStateStore = None
+    # Whether refresh_token is implemented; the background refresher skips other providers
+    supports_refresh: bool = False
+
+    def _generate_pkce_pair(self) -> tuple[str, str]:
+        """Generate PKCE code verifier and challenge"""
+        code_verifier = base64.urlsafe_b64encode(secrets.token_bytes(32)).decode('utf-8').rstrip('=')
+        code_challenge = base64.urlsafe_b64encode(
+            hashlib.sha256(code_verifier.encode('utf-8')).digest()
+        ).decode('utf-8').rstrip('=')
+        return code_verifier, code_challenge
+
+    def _generate_state(self) -> str:
+        """Generate cryptographically secure state parameter"""
+        return secrets.token_urlsafe(32)
+
+    def save_pending_login(self, session_key: str, state: str, code_verifier: str):
+        """Remember a login started by get_auth_url until its callback (or the store TTL)"""
+        self.state_store.put(f"{self.name}:{session_key}", {"state": state, "code_verifier": code_verifier})
+
+    async def take_pending_login(self, session_key: str, state: str) -> str:
+        """
+        Consume the pending login for a callback and return its PKCE code
+        verifier. The SQLite and Redis stores block, so the pop runs in a thread.
+        """
+        pending = await asyncio.to_thread(self.state_store.pop, f"{self.name}:{session_key}")
+        if not pending or not secrets.compare_digest(pending["state"], state):
+            raise ValueError("Invalid or expired state parameter - possible CSRF attack")
+        return pending["code_verifier"]
+
+    async def _token_request(self, url: str, data: Dict[str, str], headers: Optional[Dict[str, str]] = None) -> Dict:
+        """POST a form to a token endpoint over the shared keep-alive client and return the JSON body"""
+        client = get_async_client()
+        headers = {"Accept": "application/json", **(headers or {})}
+        for attempt in range(OAUTH_HTTP_RETRIES + 1):
+            try:
+                response = await client.post(url, data=data, headers=headers, timeout=OAUTH_HTTP_TIMEOUT)
+            except httpx.HTTPError as e:
+                raise ValueError(f"Token request failed: {str(e) or type(e).__name__}")
+            if response.status_code not in _RETRY_STATUSES or attempt == OAUTH_HTTP_RETRIES:
+                break
+            try:
+                delay = min(float(response.headers["Retry-After"]), 5.0)
+            except (KeyError, ValueError):
+                delay = 0.5 * 2 ** attempt
+            await asyncio.sleep(delay)
+
+        try:
+            token_data = response.json()
+        except ValueError:
+            token_data = {}
+        if "error" in token_data:
+            error_description = token_data.get("error_description", "Unknown OAuth error")
+            raise ValueError(f"OAuth2.0 error: {token_data['error']} - {error_description}")
+        if response.is_error:
+            raise ValueError(f"Token request failed: HTTP {response.status_code}")
+        return token_data
+
     @abstractmethod
     def get_auth_url(self, redirect_uri: str, user_id: str = None) -> Dict[str, str]:
         """
@@ -26,7 +108,7 @@ class OAuthProvider(ABC):
         pass
 
     @abstractmethod
-    def exchange_code(self, code: str, state: str, redirect_uri: str = None, session_key: str = None) -> Dict:
+    async def exchange_code(self, code: str, state: str, redirect_uri: str = None, session_key: str = None) -> Dict:
         """
         Exchange authorization code for access tokens with security validation.
         
@@ -40,3 +122,7 @@ class OAuthProvider(ABC):
             Dict containing access_token, refresh_token, expires_in, etc.
         """
         pass
+
+    async def refresh_token(self, refresh_token: str) -> Dict:
+        """Refresh an expired OAuth2.0 token using refresh token"""
+        raise ValueError(f"{self.name} OAuth does not support token refresh")
@@ -1,24 +1,74 @@
 # oauth/solaredge.py
-import requests
+import os
+from urllib.parse import urlencode
+from typing import Optional, Dict
+from dotenv import load_dotenv
+
 from api.oauth.manager import OAuthProvider, register_provider
 
-CLIENT_ID = "YOUR_SOLAREDGE_CLIENT_ID"
-CLIENT_SECRET = "YOUR_CLIENT_SECRET"
-AUTH_URL = "https://solaredge.com/oauth/authorize"
-TOKEN_URL = "https://solaredge.com/oauth/token"
+load_dotenv()
+
+CLIENT_ID = os.getenv("SOLAREDGE_CLIENT_ID")
+CLIENT_SECRET = os.getenv("SOLAREDGE_CLIENT_SECRET")
+DEFAULT_REDIRECT_URI = os.getenv("SOLAREDGE_REDIRECT_URI", "https://silvanus-a4nt.onrender.com/oauth/callback/solaredge")
+AUTH_URL = os.getenv("SOLAREDGE_AUTH_URL", "https://solaredge.com/oauth/authorize")
+TOKEN_URL = os.getenv("SOLAREDGE_TOKEN_URL", "https://solaredge.com/oauth/token")
 
 @register_provider("solaredge")
 class SolarEdgeOAuth(OAuthProvider):
-    def get_auth_url(self, redirect_uri: str) -> str:
-        return f"{AUTH_URL}?response_type=code&client_id={CLIENT_ID}&redirect_uri={redirect_uri}&scope=read_site"
+    supports_refresh = True
+
+    def _require_credentials(self):
+        if not CLIENT_ID or not CLIENT_SECRET:
+            raise ValueError("SolarEdge OAuth is not configured (SOLAREDGE_CLIENT_ID / SOLAREDGE_CLIENT_SECRET)")
+
+    def get_auth_url(self, redirect_uri: Optional[str] = None, user_id: Optional[str] = None) -> Dict[str, str]:
+        """Generate authorization URL with PKCE and state parameters"""
+        self._require_credentials()
+        redirect_uri = redirect_uri or DEFAULT_REDIRECT_URI
+
+        code_verifier, code_challenge = self._generate_pkce_pair()
+        state = self._generate_state()
+
+        session_key = user_id or state
+        self.save_pending_login(session_key, state, code_verifier)
+
+        params = {
+            "response_type": "code",
+            "client_id": CLIENT_ID,
+            "redirect_uri": redirect_uri,
+            "scope": "read_site",
+            "state": state,
+            "code_challenge": code_challenge,
+            "code_challenge_method": "S256",
+        }
+        return {
+            "auth_url": f"{AUTH_URL}?{urlencode(params)}",
+            "state": state,
+            "session_key": session_key
+        }
 
-    def exchange_code(self, code: str, redirect_uri: str):
-        response = requests.post(TOKEN_URL, data={
+    async def exchange_code(self, code: str, state: str, redirect_uri: Optional[str] = None, session_key: Optional[str] = None) -> dict:
+        """Exchange authorization code for tokens with PKCE validation"""
+        self._require_credentials()
+        redirect_uri = redirect_uri or DEFAULT_REDIRECT_URI
+        code_verifier = await self.take_pending_login(session_key or state, state)
+
+        return await self._token_request(TOKEN_URL, {
             "grant_type": "authorization_code",
             "code": code,
             "redirect_uri": redirect_uri,
             "client_id": CLIENT_ID,
             "client_secret": CLIENT_SECRET,
+            "code_verifier": code_verifier,
+        })
+
+    async def refresh_token(self, refresh_token: str) -> dict:
+        """Refresh an expired OAuth2.0 token using refresh token"""
+        self._require_credentials()
+        return await self._token_request(TOKEN_URL, {
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+            "client_id": CLIENT_ID,
+            "client_secret": CLIENT_SECRET,
         })
-        response.raise_for_status()
-        return response.json()
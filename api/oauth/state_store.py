@@ -0,0 +1,160 @@
+# oauth/state_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# memory (single process), sqlite:///path/to/oauth_state.db or redis://host:6379/0
+OAUTH_STATE_STORE = os.getenv("OAUTH_STATE_STORE", "memory")
+OAUTH_STATE_TTL = int(os.getenv("OAUTH_STATE_TTL", "600"))
+OAUTH_STATE_MAX_ENTRIES = int(os.getenv("OAUTH_STATE_MAX_ENTRIES", "10000"))
+
+class OAuthStateStore(ABC):
+    """Short-lived storage for pending OAuth logins (state and PKCE verifier), keyed by session key"""
+
+    def __init__(self, ttl: int = OAUTH_STATE_TTL):
+        self.ttl = ttl
+
+    @abstractmethod
+    def put(self, key: str, value: Dict[str, Any]):
+        """Store a pending login, replacing any earlier one for the same key"""
+
+    @abstractmethod
+    def pop(self, key: str) -> Optional[Dict[str, Any]]:
+        """Atomically take a pending login, so it can only be completed once"""
+
+    def close(self):
+        pass
+
+class MemoryStateStore(OAuthStateStore):
+    """In-process LRU with TTL eviction, for a single API worker"""
+
+    def __init__(self, ttl: int = OAUTH_STATE_TTL, max_entries: int = OAUTH_STATE_MAX_ENTRIES):
+        super().__init__(ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float):
+        # Entries are kept in insertion order, so expired ones are at the front
+        while self._entries:
+            key, (expires_at, _) = next(iter(self._entries.items()))
+            if expires_at > now and len(self._entries) <= self.max_entries:
+                return
+            del self._entries[key]
+
+    def put(self, key: str, value: Dict[str, Any]):
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (now + self.ttl, value)
+            self._evict(now)
+
+    def pop(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class SQLiteStateStore(OAuthStateStore):
+    """Shared store for several workers on one host"""
+
+    _PURGE_EVERY = 100
+
+    def __init__(self, path: str, ttl: int = OAUTH_STATE_TTL):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._puts = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS oauth_state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_oauth_state_expires_at ON oauth_state (expires_at)")
+
+    def put(self, key: str, value: Dict[str, Any]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO oauth_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + self.ttl),
+            )
+            self._puts += 1
+            if self._puts % self._PURGE_EVERY == 0:
+                self._conn.execute("DELETE FROM oauth_state WHERE expires_at <= ?", (now,))
+
+    def pop(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two workers cannot both read the row
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM oauth_state WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute("DELETE FROM oauth_state WHERE key = ?", (key,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class RedisStateStore(OAuthStateStore):
+    """Shared store for workers on several hosts; works with any Redis-protocol server"""
+
+    def __init__(self, url: str, ttl: int = OAUTH_STATE_TTL, prefix: str = "oauth_state:"):
+        super().__init__(ttl)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("OAUTH_STATE_STORE=redis:// requires the 'redis' package") from e
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def pop(self, key: str) -> Optional[Dict[str, Any]]:
+        # GET and DEL in one MULTI/EXEC instead of GETDEL, which needs Redis 6.2+
+        pipe = self._client.pipeline(transaction=True)
+        pipe.get(self.prefix + key)
+        pipe.delete(self.prefix + key)
+        raw, _ = pipe.execute()
+        return json.loads(raw) if raw is not None else None
+
+    def close(self):
+        self._client.close()
+
+def create_state_store(url: str = OAUTH_STATE_STORE) -> OAuthStateStore:
+    if url == "memory":
+        return MemoryStateStore()
+    if url.startswith("sqlite:///"):
+        return SQLiteStateStore(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStateStore(url)
+    raise ValueError("OAUTH_STATE_STORE must be 'memory', sqlite:///path or redis://host:port/db")
+
+_store: Optional[OAuthStateStore] = None
+_store_lock = threading.Lock()
+
+def get_state_store() -> OAuthStateStore:
+    """Store shared by every registered OAuth provider in this process"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = create_state_store()
+        return _store
@@ -0,0 +1,162 @@
+# api/poll_scheduler.py
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from api.poller_shards import ShardLeaseManager
+from api.polling import POLL_CONCURRENCY, POLL_JITTER, poll_all_tokens_async
+
+logger = logging.getLogger(__name__)
+
+POLL_SCHEDULER_ENABLED = os.getenv("POLL_SCHEDULER_ENABLED", "false").lower() in ("1", "true", "yes")
+# How often the scheduler looks for due tokens; each token's own cadence lives in poll_schedules
+POLL_TICK_SECONDS = int(os.getenv("POLL_TICK_SECONDS", "30"))
+POLL_JOB_HISTORY = int(os.getenv("POLL_JOB_HISTORY", "20"))
+
+@dataclass
+class PollJob:
+    id: str
+    trigger: str
+    state: str = "queued"  # queued, running, succeeded or failed
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stats: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    @property
+    def active(self) -> bool:
+        return self.state in ("queued", "running")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "trigger": self.trigger,
+            "state": self.state,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "stats": self.stats,
+            "error": self.error,
+        }
+
+class PollScheduler:
+    """
+    Runs poll passes as background jobs, on a jittered tick and on demand.
+    Only one pass runs at a time; a trigger while a pass is running returns
+    that pass instead of starting another.
+    """
+
+    def __init__(self, concurrency: int = POLL_CONCURRENCY, shards: Optional[ShardLeaseManager] = None,
+                 tick_seconds: int = POLL_TICK_SECONDS, history: int = POLL_JOB_HISTORY):
+        self.concurrency = concurrency
+        self.shards = shards
+        self.tick_seconds = tick_seconds
+        self.history = history
+        self.jobs: "OrderedDict[str, PollJob]" = OrderedDict()
+        self._current: Optional[PollJob] = None
+        self._task: Optional[asyncio.Task] = None
+        self._scheduler: Optional[AsyncIOScheduler] = None
+
+    def trigger(self, source: str = "manual") -> PollJob:
+        if self._current is not None and self._current.active:
+            return self._current
+
+        job = PollJob(id=uuid.uuid4().hex[:12], trigger=source)
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            self.jobs.popitem(last=False)
+        self._current = job
+        self._task = asyncio.create_task(self._run(job))
+        return job
+
+    async def _run(self, job: PollJob):
+        job.state = "running"
+        job.started_at = datetime.utcnow()
+        try:
+            stats = await poll_all_tokens_async(self.concurrency, shards=self.shards)
+            job.stats = stats.summary()
+            job.state = "succeeded"
+        except Exception as e:
+            job.state = "failed"
+            job.error = str(e)
+            logger.exception("Poll job %s failed: %s", job.id, e)
+        finally:
+            job.finished_at = datetime.utcnow()
+
+    async def _tick(self):
+        self.trigger("schedule")
+        await self._task
+
+    def start(self):
+        """Start ticking on the running event loop"""
+        if self._scheduler is not None:
+            return
+        self._scheduler = AsyncIOScheduler()
+        self._scheduler.add_job(
+            self._tick, "interval",
+            seconds=self.tick_seconds,
+            jitter=max(1, int(self.tick_seconds * POLL_JITTER)),
+            id="poll", max_instances=1, coalesce=True,
+            next_run_time=datetime.now(),
+        )
+        self._scheduler.start()
+
+    async def stop(self):
+        """Stop ticking and wait for a running pass to finish"""
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+        if self._task is not None and not self._task.done():
+            await self._task
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "scheduled": self._scheduler is not None,
+            "tick_seconds": self.tick_seconds,
+            "current": self._current.to_dict() if self._current is not None else None,
+            "jobs": [job.to_dict() for job in reversed(self.jobs.values())],
+        }
+
+_poll_scheduler: Optional[PollScheduler] = None
+
+def get_poll_scheduler() -> PollScheduler:
+    """Scheduler for this process; manual triggers work even when ticking is disabled"""
+    global _poll_scheduler
+    if _poll_scheduler is None:
+        _poll_scheduler = PollScheduler()
+    return _poll_scheduler
+
+async def start_poll_scheduler():
+    if POLL_SCHEDULER_ENABLED:
+        get_poll_scheduler().start()
+
+async def stop_poll_scheduler():
+    if _poll_scheduler is not None:
+        await _poll_scheduler.stop()
+
+async def run_poll_scheduler(stop: asyncio.Event, concurrency: int = POLL_CONCURRENCY,
+                             sharded: bool = False, worker_id: Optional[str] = None):
+    """Long-running poller: tick until `stop` is set, holding shard leases for the whole run if sharded"""
+    shards = ShardLeaseManager(worker_id) if sharded else None
+    heartbeats = None
+    if shards is not None:
+        await shards.heartbeat()
+        heartbeats = asyncio.create_task(shards.run_heartbeats(stop))
+
+    scheduler = PollScheduler(concurrency, shards=shards)
+    scheduler.start()
+    try:
+        await stop.wait()
+    finally:
+        await scheduler.stop()
+        if shards is not None:
+            await heartbeats
+            await shards.release()
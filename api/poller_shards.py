@@ -0,0 +1,140 @@
+# api/poller_shards.py
+import asyncio
+import logging
+import math
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import FrozenSet, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from api.database import AsyncSessionLocal
+from api.models.poller_lease import PollerLease, PollerWorker
+
+logger = logging.getLogger(__name__)
+
+# Tokens are split into a fixed number of shards (token id modulo the count);
+# every poller in the cluster must use the same value
+POLL_SHARD_COUNT = int(os.getenv("POLL_SHARD_COUNT", "16"))
+POLL_LEASE_TTL = int(os.getenv("POLL_LEASE_TTL", "60"))
+POLL_HEARTBEAT_INTERVAL = int(os.getenv("POLL_HEARTBEAT_INTERVAL", "20"))
+
+if POLL_SHARD_COUNT < 1:
+    raise ValueError("POLL_SHARD_COUNT must be at least 1")
+if POLL_HEARTBEAT_INTERVAL >= POLL_LEASE_TTL:
+    raise ValueError("POLL_HEARTBEAT_INTERVAL must be shorter than POLL_LEASE_TTL")
+
+def default_worker_id() -> str:
+    return os.getenv("POLLER_WORKER_ID") or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+class ShardLeaseManager:
+    """
+    Claims and renews shard leases in the database. Each worker takes a fair
+    share of the shards; leases of a worker that stops heartbeating expire and
+    are picked up by the others on their next heartbeat.
+    """
+
+    def __init__(self, worker_id: Optional[str] = None, shard_count: int = POLL_SHARD_COUNT,
+                 lease_ttl: int = POLL_LEASE_TTL, heartbeat_interval: int = POLL_HEARTBEAT_INTERVAL):
+        self.worker_id = worker_id or default_worker_id()
+        self.shard_count = shard_count
+        self.lease_ttl = timedelta(seconds=lease_ttl)
+        self.heartbeat_interval = heartbeat_interval
+        self.owned: FrozenSet[int] = frozenset()
+
+    async def _fair_share(self, db, now: datetime) -> int:
+        other_workers = await db.scalar(
+            select(func.count())
+            .select_from(PollerWorker)
+            .where(PollerWorker.expires_at > now, PollerWorker.worker_id != self.worker_id)
+        )
+        return math.ceil(self.shard_count / (other_workers + 1))
+
+    async def _register(self, now: datetime, expires_at: datetime):
+        async with AsyncSessionLocal() as db, db.begin():
+            result = await db.execute(
+                update(PollerWorker)
+                .where(PollerWorker.worker_id == self.worker_id)
+                .values(expires_at=expires_at, heartbeat_at=now)
+            )
+            if result.rowcount == 0:
+                db.add(PollerWorker(worker_id=self.worker_id, expires_at=expires_at, heartbeat_at=now))
+
+    async def heartbeat(self) -> FrozenSet[int]:
+        """Renew owned leases, claim free or expired shards up to a fair share, and release any surplus"""
+        now = datetime.utcnow()
+        expires_at = now + self.lease_ttl
+        await self._register(now, expires_at)
+
+        async with AsyncSessionLocal() as db, db.begin():
+            await db.execute(
+                update(PollerLease)
+                .where(PollerLease.owner == self.worker_id, PollerLease.expires_at > now)
+                .values(expires_at=expires_at, heartbeat_at=now)
+            )
+            owned = set((await db.execute(
+                select(PollerLease.shard_id).where(PollerLease.owner == self.worker_id, PollerLease.expires_at > now)
+            )).scalars().all())
+            share = await self._fair_share(db, now)
+            leases = dict((await db.execute(select(PollerLease.shard_id, PollerLease.expires_at))).all())
+
+        # Give back shards beyond our share so newly started workers get some
+        surplus = sorted(owned)[share:]
+        if surplus:
+            async with AsyncSessionLocal() as db, db.begin():
+                await db.execute(
+                    delete(PollerLease)
+                    .where(PollerLease.owner == self.worker_id, PollerLease.shard_id.in_(surplus))
+                )
+            owned.difference_update(surplus)
+
+        for shard in range(self.shard_count):
+            if len(owned) >= share:
+                break
+            if shard in owned or (shard in leases and leases[shard] > now):
+                continue
+            if await self._claim(shard, shard in leases, now, expires_at):
+                owned.add(shard)
+
+        if frozenset(owned) != self.owned:
+            logger.info("Poller %s now owns shards %s", self.worker_id, sorted(owned))
+        self.owned = frozenset(owned)
+        return self.owned
+
+    async def _claim(self, shard: int, existing: bool, now: datetime, expires_at: datetime) -> bool:
+        try:
+            async with AsyncSessionLocal() as db, db.begin():
+                if not existing:
+                    db.add(PollerLease(shard_id=shard, owner=self.worker_id, expires_at=expires_at, heartbeat_at=now))
+                    return True
+                # Compare-and-set: only take the shard if its lease is still expired
+                result = await db.execute(
+                    update(PollerLease)
+                    .where(PollerLease.shard_id == shard, PollerLease.expires_at <= now)
+                    .values(owner=self.worker_id, expires_at=expires_at, heartbeat_at=now)
+                )
+                return result.rowcount == 1
+        except IntegrityError:
+            return False
+
+    async def release(self):
+        """Give up every lease held by this worker"""
+        async with AsyncSessionLocal() as db, db.begin():
+            await db.execute(delete(PollerLease).where(PollerLease.owner == self.worker_id))
+            await db.execute(delete(PollerWorker).where(PollerWorker.worker_id == self.worker_id))
+        self.owned = frozenset()
+
+    async def run_heartbeats(self, stop: asyncio.Event):
+        """Heartbeat until `stop` is set; meant to run alongside poll runs"""
+        while not stop.is_set():
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning("Lease heartbeat failed for %s: %s", self.worker_id, e)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.heartbeat_interval)
+            except asyncio.TimeoutError:
+                pass
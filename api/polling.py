@@ -1,52 +1,681 @@
 # api/polling.py
-from datetime import datetime
-from sqlalchemy.orm import Session
-import requests
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 
-from api.database import SessionLocal
+import httpx
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from api.database import (
+    AsyncReadSessionLocal, AsyncSessionLocal, DATABASE_REPLICA_URLS, async_engine, dispose_async_engines,
+)
+from api.http_client import get_async_client, close_async_client
 from api.models.tokens import OAuthToken
+from api.models.poll_watermark import PollWatermark
+from api.models.poll_schedule import PollSchedule
+from api.models.poll_outbox import PollOutbox
+from api.energy.manager import EnergyDataProvider, Reading, get_data_provider
+from api.energy import solaredge, mock  # register the energy data adapters
+from api.poller_shards import ShardLeaseManager
+from api.submission import SubmissionQueue, get_submission_queue
+from api.validation import BaseActivitySubmission
+
+logger = logging.getLogger(__name__)
+
+# auto: use the in-process submission queue when running inside the API, else the batch endpoint
+POLL_SUBMIT_MODE = os.getenv("POLL_SUBMIT_MODE", "auto").lower()
+ACTIVITY_BATCH_SUBMIT_URL = os.getenv(
+    "ACTIVITY_BATCH_SUBMIT_URL", "https://silvanus-a4nt.onrender.com/v2/activities/submit-batch"
+)
+POLLER_API_KEY = os.getenv("POLLER_API_KEY")
+POLL_SUBMIT_BATCH_SIZE = int(os.getenv("POLL_SUBMIT_BATCH_SIZE", "200"))
+POLL_SUBMIT_LINGER = float(os.getenv("POLL_SUBMIT_LINGER", "0.2"))
+# Claimed readings still in poll_outbox after this long are submitted again under the same idempotency key
+POLL_OUTBOX_RETRY_AFTER = float(os.getenv("POLL_OUTBOX_RETRY_AFTER", "600"))
+POLL_OUTBOX_BATCH_SIZE = int(os.getenv("POLL_OUTBOX_BATCH_SIZE", "500"))
+
+if POLL_SUBMIT_MODE not in ("auto", "inprocess", "http"):
+    raise ValueError("POLL_SUBMIT_MODE must be one of: auto, inprocess, http")
+
+POLL_CONCURRENCY = int(os.getenv("POLL_CONCURRENCY", "50"))
+POLL_SCAN_CHUNK_SIZE = int(os.getenv("POLL_SCAN_CHUNK_SIZE", "1000"))
+# Providers that only authenticate users and have no energy data to poll
+NON_POLLABLE_PROVIDERS = ("github",)
+SUBMIT_TIMEOUT = float(os.getenv("POLL_SUBMIT_TIMEOUT", "30"))
+DEFAULT_PROVIDER_TIMEOUT = float(os.getenv("POLL_PROVIDER_TIMEOUT", "10"))
+PROVIDER_TIMEOUTS = {
+    "solaredge": float(os.getenv("POLL_SOLAREDGE_TIMEOUT", str(DEFAULT_PROVIDER_TIMEOUT))),
+}
+
+def _parse_provider_intervals(value: str) -> Dict[str, float]:
+    """Parse "solaredge=900,enphase=1800" into {provider: seconds}"""
+    intervals = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        provider, _, seconds = item.partition("=")
+        intervals[provider.strip()] = float(seconds)
+    return intervals
+
+# Cadence: each token is due again after its provider's interval (or its own
+# override). Tokens that keep returning no new data are stretched towards
+# POLL_MAX_INTERVAL; 429/5xx and timeouts back off exponentially.
+POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "900"))
+POLL_PROVIDER_INTERVALS = _parse_provider_intervals(os.getenv("POLL_PROVIDER_INTERVALS", ""))
+POLL_MAX_INTERVAL = float(os.getenv("POLL_MAX_INTERVAL", str(6 * 3600)))
+POLL_IDLE_STRETCH = float(os.getenv("POLL_IDLE_STRETCH", "1.5"))
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.1"))
+POLL_BACKOFF_BASE = float(os.getenv("POLL_BACKOFF_BASE", "60"))
+POLL_MAX_BACKOFF = float(os.getenv("POLL_MAX_BACKOFF", "3600"))
+POLL_SCHEDULE_FLUSH_SIZE = 100
+
+if not 0 <= POLL_JITTER < 1:
+    raise ValueError("POLL_JITTER must be in [0, 1)")
+
+# Serve every provider from the simulated adapter (development without provider credentials)
+POLL_USE_MOCK_DATA = os.getenv("POLL_USE_MOCK_DATA", "false").lower() in ("1", "true", "yes")
+
+class PollTarget(NamedTuple):
+    """Plain snapshot of an OAuthToken row and its watermark, safe to hand to worker tasks"""
+    id: int
+    wallet_address: str
+    provider: str
+    access_token: str
+    last_reading_at: Optional[datetime] = None
+    provider_cursor: Optional[str] = None
+    poll_interval: Optional[float] = None
+    interval_override: Optional[float] = None
+    consecutive_failures: int = 0
+
+class PollOutcome(NamedTuple):
+    """Result of polling one token: submitted, no_new_data, deferred or a failure reason"""
+    status: str
+    retryable: bool = False
+    retry_after: Optional[float] = None
+
+@dataclass
+class PollStats:
+    processed: int = 0
+    submitted: int = 0
+    redelivered: int = 0
+    no_new_data: int = 0
+    deferred: int = 0
+    failed: int = 0
+    failures: Dict[str, int] = field(default_factory=dict)
+    latencies: List[float] = field(default_factory=list)
+    started_at: float = field(default_factory=time.perf_counter)
+
+    # Reservoir sample keeps percentile memory constant on very large runs
+    MAX_LATENCY_SAMPLES = 10000
+
+    def record_latency(self, seconds: float):
+        if len(self.latencies) < self.MAX_LATENCY_SAMPLES:
+            self.latencies.append(seconds)
+            return
+        slot = random.randrange(self.processed)
+        if slot < self.MAX_LATENCY_SAMPLES:
+            self.latencies[slot] = seconds
+
+    def record_failure(self, reason: str):
+        self.failed += 1
+        self.failures[reason] = self.failures.get(reason, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 2)
+
+        return {
+            "tokens_processed": self.processed,
+            "submitted": self.submitted,
+            "redelivered": self.redelivered,
+            "no_new_data": self.no_new_data,
+            "deferred": self.deferred,
+            "failed": self.failed,
+            "failures": self.failures,
+            "latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99)},
+            "duration_s": round(time.perf_counter() - self.started_at, 3),
+        }
+
+def data_provider_for(target: PollTarget) -> Optional[EnergyDataProvider]:
+    return get_data_provider("mock" if POLL_USE_MOCK_DATA else target.provider)
+
+async def fetch_reading(client: httpx.AsyncClient, target: PollTarget, timeout: float) -> Optional[Reading]:
+    provider = data_provider_for(target)
+    if provider is None:
+        raise LookupError(f"No energy data adapter for provider {target.provider}")
+    return await provider.fetch_reading(client, target.access_token, target.last_reading_at,
+                                        target.provider_cursor, timeout)
 
-ACTIVITY_SUBMIT_URL = "https://silvanus-a4nt.onrender.com/activities/submit"
+def idempotency_key(target: PollTarget, reading: Reading) -> str:
+    """Stable key for one token's reading window, so a retried submission can be recognised"""
+    return f"{target.id}:{reading.period_end.isoformat()}"
 
-def fetch_mock_solaredge_data(token: str):
-    # Replace this with a real SolarEdge API call later
+def reading_payload(target: PollTarget, reading: Reading) -> Dict[str, Any]:
     return {
-        "kwh": 2.5,
-        "timestamp": datetime.utcnow().isoformat()
+        "wallet_address": target.wallet_address,
+        "activity_type": "solar_export",
+        "value": reading.kwh,
+        "details": {
+            "source": f"oauth:{target.provider}",
+            "period_start": reading.period_start.isoformat(),
+            "period_end": reading.period_end.isoformat(),
+            "idempotency_key": idempotency_key(target, reading),
+        },
     }
 
-def poll_all_tokens():
-    db: Session = SessionLocal()
-    tokens = db.query(OAuthToken).all()
+# Submitter results that mean the reward is queued for sending
+ACCEPTED = ("queued", "duplicate")
 
-    for token in tokens:
-        if token.provider == "github":
-            # In real use, skip GitHub or treat it as a placeholder
-            print(f"Skipping GitHub token for wallet {token.wallet_address}")
-            continue
+class InProcessSubmitter:
+    """Hands readings straight to the API's submission queue when the poller runs inside the API"""
 
-        if not token.access_token:
-            print(f"Missing token for wallet {token.wallet_address}")
-            continue
+    def __init__(self, queue: SubmissionQueue):
+        self.queue = queue
 
+    async def submit(self, payload: Dict[str, Any]) -> str:
         try:
-            # Fetch data from provider
-            data = fetch_mock_solaredge_data(token.access_token)
-
-            # Submit to your backend
-            response = requests.post(ACTIVITY_SUBMIT_URL, json={
-                "wallet_address": token.wallet_address,
-                "kwh": data["kwh"],
-                "source": f"oauth:{token.provider}",
-                "timestamp": data["timestamp"]
-            })
-
-            if response.status_code == 200:
-                print(f"Submitted {data['kwh']} kWh for {token.wallet_address}")
+            activity = BaseActivitySubmission.model_validate(payload)
+            return self.queue.submit_nowait(activity, "poller")
+        except (ValidationError, HTTPException):
+            return "rejected"
+        except asyncio.QueueFull:
+            return "queue_full"
+
+    async def close(self):
+        pass
+
+class BatchSubmitter:
+    """
+    Collects readings from the poll workers and posts them to the batch
+    endpoint, flushing when a batch is full or after a short linger.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, url: str = ACTIVITY_BATCH_SUBMIT_URL,
+                 batch_size: int = POLL_SUBMIT_BATCH_SIZE, linger: float = POLL_SUBMIT_LINGER):
+        self.client = client
+        self.url = url
+        self.batch_size = batch_size
+        self.linger = linger
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.Task] = None
+
+    async def submit(self, payload: Dict[str, Any]) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((payload, future))
+        if len(self._pending) >= self.batch_size:
+            await self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.linger)
+        self._timer = None
+        await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        headers = {"X-API-Key": POLLER_API_KEY} if POLLER_API_KEY else {}
+        try:
+            response = await self.client.post(
+                self.url, json={"activities": [payload for payload, _ in batch]},
+                headers=headers, timeout=SUBMIT_TIMEOUT,
+            )
+            if response.status_code == 202:
+                statuses = {item["index"]: item["status"] for item in response.json()["results"]}
             else:
-                print(f"Failed to submit for {token.wallet_address}: {response.text}")
+                logger.warning("Batch submission of %s readings failed: %s", len(batch), response.text)
+                statuses = dict.fromkeys(range(len(batch)), f"submit_{response.status_code}")
+        except httpx.HTTPError as e:
+            logger.warning("Batch submission of %s readings failed: %s", len(batch), e)
+            statuses = dict.fromkeys(range(len(batch)), type(e).__name__)
+
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(statuses.get(index, "missing"))
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self._flush()
+
+def make_submitter(client: httpx.AsyncClient):
+    queue = get_submission_queue() if POLL_SUBMIT_MODE != "http" else None
+    if queue is not None:
+        return InProcessSubmitter(queue)
+    if POLL_SUBMIT_MODE == "inprocess":
+        raise RuntimeError("POLL_SUBMIT_MODE=inprocess but the submission queue is not running")
+    return BatchSubmitter(client)
+
+async def claim_reading(target: PollTarget, reading: Reading, payload: Dict[str, Any]) -> bool:
+    """
+    Move the token's watermark to the end of `reading` and record the reading
+    in poll_outbox, in one transaction, before anything is submitted. The
+    watermark update is a compare-and-set on the previous watermark, so of two
+    concurrent runs only one claims the reading; the other gets False. The
+    outbox row is removed by the submission queue once the reward is sent.
+    """
+    now = datetime.utcnow()
+    async with AsyncSessionLocal() as db:
+        try:
+            async with db.begin():
+                if target.last_reading_at is None:
+                    db.add(PollWatermark(
+                        token_id=target.id,
+                        last_reading_at=reading.period_end,
+                        provider_cursor=reading.cursor,
+                        last_success_at=now,
+                    ))
+                else:
+                    result = await db.execute(
+                        update(PollWatermark)
+                        .where(
+                            PollWatermark.token_id == target.id,
+                            PollWatermark.last_reading_at == target.last_reading_at,
+                        )
+                        .values(last_reading_at=reading.period_end, provider_cursor=reading.cursor,
+                                last_success_at=now)
+                    )
+                    if result.rowcount != 1:
+                        return False
+                db.add(PollOutbox(
+                    idempotency_key=payload["details"]["idempotency_key"],
+                    token_id=target.id,
+                    payload=json.dumps(payload),
+                    next_attempt_at=now + timedelta(seconds=POLL_OUTBOX_RETRY_AFTER),
+                ))
+            return True
+        except IntegrityError:
+            return False
+
+async def release_reading(target: PollTarget, reading: Reading):
+    """Undo claim_reading for a reading the submitter refused, so the next poll fetches it again"""
+    current = and_(PollWatermark.token_id == target.id, PollWatermark.last_reading_at == reading.period_end)
+    async with AsyncSessionLocal() as db, db.begin():
+        await db.execute(delete(PollOutbox).where(PollOutbox.idempotency_key == idempotency_key(target, reading)))
+        if target.last_reading_at is None:
+            await db.execute(delete(PollWatermark).where(current))
+        else:
+            await db.execute(
+                update(PollWatermark).where(current)
+                .values(last_reading_at=target.last_reading_at, provider_cursor=target.provider_cursor)
+            )
+
+async def redeliver_pending(submitter, stats: PollStats, shards: Optional[ShardLeaseManager] = None,
+                            limit: int = POLL_OUTBOX_BATCH_SIZE):
+    """
+    Submit outbox readings that were claimed but never sent: the process
+    stopped with them queued, or the send failed. Each row is leased with a
+    compare-and-set on next_attempt_at first, so concurrent pollers do not
+    resend the same row; the idempotency key covers a reward still queued.
+    """
+    if shards is not None and not shards.owned:
+        return
+    now = datetime.utcnow()
+    conditions = [PollOutbox.next_attempt_at <= now]
+    if shards is not None:
+        conditions.append((PollOutbox.token_id % shards.shard_count).in_(shards.owned))
+
+    leased = []
+    async with AsyncSessionLocal() as db, db.begin():
+        rows = (await db.execute(
+            select(PollOutbox.idempotency_key, PollOutbox.payload, PollOutbox.next_attempt_at)
+            .where(*conditions)
+            .order_by(PollOutbox.next_attempt_at)
+            .limit(limit)
+        )).all()
+        for key, payload, due in rows:
+            result = await db.execute(
+                update(PollOutbox)
+                .where(PollOutbox.idempotency_key == key, PollOutbox.next_attempt_at == due)
+                .values(next_attempt_at=now + timedelta(seconds=POLL_OUTBOX_RETRY_AFTER),
+                        attempts=PollOutbox.attempts + 1)
+            )
+            if result.rowcount == 1:
+                leased.append((key, json.loads(payload)))
+    if not leased:
+        return
+
+    statuses = await asyncio.gather(*(submitter.submit(payload) for _, payload in leased))
+    refused = [key for (key, _), status in zip(leased, statuses)
+               if status not in ACCEPTED and not _is_retryable_submit(status)]
+    stats.redelivered += sum(status in ACCEPTED for status in statuses)
+    if refused:
+        logger.error("Dropping %s pending readings the submitter refused: %s", len(refused), refused)
+        async with AsyncSessionLocal() as db, db.begin():
+            await db.execute(delete(PollOutbox).where(PollOutbox.idempotency_key.in_(refused)))
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+def _is_retryable_status(code: int) -> bool:
+    return code == 429 or code >= 500
 
+def _is_retryable_submit(status: str) -> bool:
+    if status == "queue_full":
+        return True
+    if status.startswith("submit_"):
+        return _is_retryable_status(int(status[len("submit_"):]))
+    # Transport errors from the batch endpoint are reported by exception name
+    return status not in ("rejected", "missing")
+
+class ProviderThrottle:
+    """Pauses a whole provider for the rest of a run once it answers 429"""
+
+    def __init__(self):
+        self._paused_until: Dict[str, float] = {}
+
+    def pause(self, provider: str, seconds: float):
+        until = time.monotonic() + seconds
+        self._paused_until[provider] = max(until, self._paused_until.get(provider, 0.0))
+
+    def remaining(self, provider: str) -> float:
+        return max(0.0, self._paused_until.get(provider, 0.0) - time.monotonic())
+
+async def poll_token(client: httpx.AsyncClient, target: PollTarget, stats: PollStats, submitter,
+                     throttle: Optional[ProviderThrottle] = None) -> PollOutcome:
+    started = time.perf_counter()
+    outcome = PollOutcome("error")
+    try:
+        paused = throttle.remaining(target.provider) if throttle else 0.0
+        if paused:
+            stats.deferred += 1
+            outcome = PollOutcome("deferred", retry_after=paused)
+            return outcome
+
+        timeout = PROVIDER_TIMEOUTS.get(target.provider, DEFAULT_PROVIDER_TIMEOUT)
+        reading = await asyncio.wait_for(fetch_reading(client, target, timeout), timeout)
+        if reading is None or reading.kwh <= 0:
+            stats.no_new_data += 1
+            outcome = PollOutcome("no_new_data")
+            return outcome
+
+        payload = reading_payload(target, reading)
+        if not await claim_reading(target, reading, payload):
+            # Another run claimed this reading first and submits it
+            stats.record_failure("watermark_conflict")
+            outcome = PollOutcome("deferred")
+            logger.warning("Watermark for token %s moved before submission", target.id)
+            return outcome
+
+        status = await submitter.submit(payload)
+        if status in ACCEPTED:
+            stats.submitted += 1
+            outcome = PollOutcome("submitted")
+            logger.debug("Submitted %s kWh for %s", reading.kwh, target.wallet_address)
+        else:
+            retryable = _is_retryable_submit(status)
+            if not retryable:
+                await release_reading(target, reading)
+            # A retryable failure keeps its claim; redeliver_pending resends it under the same key
+            stats.record_failure(status)
+            outcome = PollOutcome(status, retryable=retryable)
+            logger.warning("Failed to submit for %s: %s", target.wallet_address, status)
+
+    except asyncio.TimeoutError:
+        stats.record_failure(f"{target.provider}_timeout")
+        outcome = PollOutcome(f"{target.provider}_timeout", retryable=True)
+        logger.warning("Provider %s timed out for %s", target.provider, target.wallet_address)
+    except httpx.HTTPStatusError as e:
+        code = e.response.status_code
+        outcome = PollOutcome(f"{target.provider}_{code}", _is_retryable_status(code), _retry_after(e.response))
+        stats.record_failure(outcome.status)
+        if code == 429 and throttle is not None:
+            throttle.pause(target.provider, outcome.retry_after or POLL_BACKOFF_BASE)
+        logger.warning("Provider %s returned %s for %s", target.provider, code, target.wallet_address)
+    except httpx.HTTPError as e:
+        stats.record_failure(type(e).__name__)
+        outcome = PollOutcome(type(e).__name__, retryable=isinstance(e, httpx.TransportError))
+        logger.warning("Polling failed for %s: %s", target.wallet_address, e)
+    except Exception as e:
+        stats.record_failure("error")
+        logger.exception("Polling failed for %s: %s", target.wallet_address, e)
+    finally:
+        stats.processed += 1
+        stats.record_latency(time.perf_counter() - started)
+    return outcome
+
+def base_interval(target: PollTarget) -> float:
+    return target.interval_override or POLL_PROVIDER_INTERVALS.get(target.provider, POLL_INTERVAL)
+
+def plan_next_poll(target: PollTarget, outcome: PollOutcome, now: datetime) -> Dict[str, Any]:
+    """Schedule row for the token's next poll, with jitter so tokens drift apart instead of bunching up"""
+    base = base_interval(target)
+    interval = target.poll_interval or base
+    failures = 0
+
+    if outcome.status == "submitted":
+        interval = delay = base
+    elif outcome.status == "no_new_data":
+        if not target.interval_override:
+            interval = min(max(interval, base) * POLL_IDLE_STRETCH, POLL_MAX_INTERVAL)
+        delay = interval
+    elif outcome.status == "deferred":
+        failures = target.consecutive_failures
+        delay = outcome.retry_after or POLL_BACKOFF_BASE
+    else:
+        failures = target.consecutive_failures + 1
+        if outcome.retryable:
+            delay = min(POLL_BACKOFF_BASE * 2 ** (failures - 1), POLL_MAX_BACKOFF)
+            delay = max(delay, outcome.retry_after or 0.0)
+        else:
+            delay = base
+
+    delay *= random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER)
+    return {
+        "token_id": target.id,
+        "next_poll_at": now + timedelta(seconds=delay),
+        "interval_seconds": interval,
+        "consecutive_failures": failures,
+        "last_outcome": outcome.status,
+        "updated_at": now,
+    }
+
+class ScheduleWriter:
+    """Buffers schedule rows from the poll workers and upserts them in batches"""
+
+    _UPDATED = ("next_poll_at", "interval_seconds", "consecutive_failures", "last_outcome", "updated_at")
+
+    def __init__(self, flush_size: int = POLL_SCHEDULE_FLUSH_SIZE):
+        self.flush_size = flush_size
+        self._rows: List[Dict[str, Any]] = []
+
+    async def add(self, row: Dict[str, Any]):
+        self._rows.append(row)
+        if len(self._rows) >= self.flush_size:
+            await self.flush()
+
+    async def flush(self):
+        rows, self._rows = self._rows, []
+        if not rows:
+            return
+
+        try:
+            await self._upsert(rows)
         except Exception as e:
-            print(f"Polling failed for {token.wallet_address}: {e}")
-    
-    db.close()
+            # The tokens simply stay due and are picked up again by the next run
+            logger.warning("Failed to save %s poll schedules: %s", len(rows), e)
+
+    async def _upsert(self, rows: List[Dict[str, Any]]):
+        dialect = async_engine.dialect.name
+        async with AsyncSessionLocal() as db, db.begin():
+            if dialect in ("sqlite", "postgresql"):
+                if dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert
+                stmt = insert(PollSchedule).values(rows)
+                # interval_override is managed by operators and never touched here
+                await db.execute(stmt.on_conflict_do_update(
+                    index_elements=[PollSchedule.token_id],
+                    set_={column: stmt.excluded[column] for column in self._UPDATED},
+                ))
+                return
+
+            for row in rows:
+                values = {column: row[column] for column in self._UPDATED}
+                result = await db.execute(
+                    update(PollSchedule).where(PollSchedule.token_id == row["token_id"]).values(**values)
+                )
+                if result.rowcount == 0:
+                    db.add(PollSchedule(**row))
+
+def pollable_tokens_filter(now: datetime):
+    """SQL filter for tokens worth polling: data providers with a live access token that are due"""
+    return and_(
+        OAuthToken.provider.notin_(NON_POLLABLE_PROVIDERS),
+        OAuthToken.access_token.isnot(None),
+        OAuthToken.access_token != "",
+        or_(OAuthToken.expires_at.is_(None), OAuthToken.expires_at > now),
+        or_(PollSchedule.next_poll_at.is_(None), PollSchedule.next_poll_at <= now),
+    )
+
+async def _with_primary_watermarks(targets: List[PollTarget]) -> List[PollTarget]:
+    """
+    Replace replica-read watermarks with the primary's. advance_watermark
+    compares against them, so a lagging copy would make the CAS fail
+    spuriously or let a reading be polled again.
+    """
+    async with AsyncSessionLocal() as primary:
+        result = await primary.execute(
+            select(PollWatermark.token_id, PollWatermark.last_reading_at, PollWatermark.provider_cursor)
+            .where(PollWatermark.token_id.in_([target.id for target in targets]))
+        )
+        current = {row.token_id: row for row in result}
+    return [
+        target._replace(
+            last_reading_at=current[target.id].last_reading_at if target.id in current else None,
+            provider_cursor=current[target.id].provider_cursor if target.id in current else None,
+        )
+        for target in targets
+    ]
+
+async def iter_poll_targets(chunk_size: int = POLL_SCAN_CHUNK_SIZE,
+                            shards: Optional[ShardLeaseManager] = None) -> AsyncIterator[PollTarget]:
+    """
+    Stream due tokens, with their watermarks and schedules, in id order using keyset pagination. Each chunk
+    uses its own short-lived session, so memory and read transactions stay
+    bounded whatever the table size. With `shards`, only tokens in shards
+    currently leased by this worker are returned; ownership is re-read per chunk.
+    The scan may run on a replica, but watermarks always come from the primary.
+    """
+    now = datetime.utcnow()
+    last_id = 0
+    while True:
+        conditions = [pollable_tokens_filter(now), OAuthToken.id > last_id]
+        if shards is not None:
+            if not shards.owned:
+                return
+            conditions.append((OAuthToken.id % shards.shard_count).in_(shards.owned))
+
+        async with AsyncReadSessionLocal() as db:
+            result = await db.execute(
+                select(
+                    OAuthToken.id, OAuthToken.wallet_address, OAuthToken.provider, OAuthToken.access_token,
+                    PollWatermark.last_reading_at, PollWatermark.provider_cursor,
+                    PollSchedule.interval_seconds, PollSchedule.interval_override,
+                    func.coalesce(PollSchedule.consecutive_failures, 0),
+                )
+                .outerjoin(PollWatermark, PollWatermark.token_id == OAuthToken.id)
+                .outerjoin(PollSchedule, PollSchedule.token_id == OAuthToken.id)
+                .where(*conditions)
+                .order_by(OAuthToken.id)
+                .limit(chunk_size)
+            )
+            rows = result.all()
+
+        targets = [PollTarget(*row) for row in rows]
+        if targets and DATABASE_REPLICA_URLS:
+            targets = await _with_primary_watermarks(targets)
+        for target in targets:
+            yield target
+
+        if len(rows) < chunk_size:
+            return
+        last_id = rows[-1].id
+
+async def poll_all_tokens_async(concurrency: int = POLL_CONCURRENCY,
+                                shards: Optional[ShardLeaseManager] = None) -> PollStats:
+    """
+    Poll every token (or, with `shards`, every token in this worker's leased
+    shards) with at most `concurrency` requests in flight over one shared client
+    """
+    stats = PollStats()
+    client = get_async_client()
+    submitter = make_submitter(client)
+    throttle = ProviderThrottle()
+    schedule = ScheduleWriter()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            target = await queue.get()
+            try:
+                if target is None:
+                    return
+                outcome = await poll_token(client, target, stats, submitter, throttle)
+                await schedule.add(plan_next_poll(target, outcome, datetime.utcnow()))
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await redeliver_pending(submitter, stats, shards)
+        async for target in iter_poll_targets(shards=shards):
+            await queue.put(target)
+    finally:
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+        await submitter.close()
+        await schedule.flush()
+
+    summary = stats.summary()
+    logger.info("Poll run complete: %s", summary)
+    return stats
+
+async def poll_owned_shards(concurrency: int = POLL_CONCURRENCY, worker_id: Optional[str] = None) -> PollStats:
+    """One sharded run: lease shards, poll them while heartbeating, then hand the leases back"""
+    shards = ShardLeaseManager(worker_id)
+    await shards.heartbeat()
+    stop = asyncio.Event()
+    heartbeats = asyncio.create_task(shards.run_heartbeats(stop))
+    try:
+        return await poll_all_tokens_async(concurrency, shards=shards)
+    finally:
+        stop.set()
+        await heartbeats
+        await shards.release()
+
+def poll_all_tokens(concurrency: int = POLL_CONCURRENCY, sharded: bool = False,
+                    worker_id: Optional[str] = None) -> Dict[str, Any]:
+    """Run a full poll from synchronous code and return the run statistics"""
+    async def run():
+        try:
+            if sharded:
+                return await poll_owned_shards(concurrency, worker_id)
+            return await poll_all_tokens_async(concurrency)
+        finally:
+            await close_async_client()
+            # Pooled async connections belong to this loop, which asyncio.run closes
+            await dispose_async_engines()
+
+    return asyncio.run(run()).summary()
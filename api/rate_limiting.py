@@ -1,4 +1,8 @@
-from fastapi import Request
+import os
+import threading
+import time
+from fastapi import HTTPException, Request
+from limits import parse
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from typing import Dict, Any
@@ -8,11 +12,60 @@ def get_user_identity(request: Request) -> str:
     user_context = getattr(request.state, 'user', None)
     
     if user_context:
-        if user_context.get('auth_method') == 'oauth2':
+        # auth_method is an AuthMethod member; compare its value
+        auth_method = getattr(user_context.get('auth_method'), 'value', user_context.get('auth_method'))
+        if auth_method == 'oauth2':
             return f"oauth2:{user_context.get('wallet_address', 'unknown')}"
-        elif user_context.get('auth_method') == 'api_key':
+        elif auth_method == 'api_key':
             return f"api_key:{user_context.get('api_key', 'unknown')}"
     
     return f"ip:{get_remote_address(request)}"
 
 limiter = Limiter(key_func=get_user_identity)
+
+# Reward submissions that arrive in batches are charged per item, so a batch
+# cannot multiply the per-request limit of /submit
+BATCH_ITEM_RATE_LIMIT = parse(os.getenv("BATCH_ITEM_RATE_LIMIT", "1000/hour"))
+
+class ItemBudget:
+    """
+    Fixed-window item counts per caller. limits 1.6 can only add one hit per
+    storage call, so a batch is charged here instead, with the check and the
+    charge of all its items made in one step under a lock. Like the slowapi
+    limiter's default storage the counts live in this process's memory.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._windows: Dict[str, Any] = {}  # identity -> [window end, items used]
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+
+    def charge(self, identity: str, count: int):
+        """Add `count` items to the caller's window; returns (charged, remaining, window end)"""
+        now = time.time()
+        with self._lock:
+            if now >= self._next_sweep:
+                # Drop windows of callers that have gone quiet so the table does not grow without bound
+                self._windows = {key: window for key, window in self._windows.items() if window[0] > now}
+                self._next_sweep = now + self.limit.get_expiry()
+            window = self._windows.get(identity)
+            if window is None or window[0] <= now:
+                window = self._windows[identity] = [now + self.limit.get_expiry(), 0]
+            remaining = self.limit.amount - window[1]
+            if count > remaining:
+                return False, remaining, window[0]
+            window[1] += count
+            return True, remaining - count, window[0]
+
+_batch_item_budget = ItemBudget(BATCH_ITEM_RATE_LIMIT)
+
+def charge_items(request: Request, count: int, budget: ItemBudget = _batch_item_budget):
+    """Charge `count` items against the caller's budget, or raise 429 without charging if fewer remain"""
+    charged, remaining, reset_at = budget.charge(get_user_identity(request), count)
+    if not charged:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: {count} items submitted, {remaining} of {budget.limit} remaining",
+            headers={"Retry-After": str(max(1, int(reset_at - time.time())))},
+        )
@@ -0,0 +1,62 @@
+# api/rewards.py
+from fastapi import HTTPException
+from web3 import Web3
+from dotenv import load_dotenv
+import os
+
+from api.blockchain_guard import ValidatedActivity, guard_metrics
+
+load_dotenv()
+
+# Load environment
+SEPOLIA_RPC_URL = os.getenv("SEPOLIA_RPC_URL")
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")
+REWARD_CONTRACT = os.getenv("REWARD_CONTRACT")
+
+# Connect to Web3
+w3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC_URL))
+sender_address = w3.eth.account.from_key(PRIVATE_KEY).address
+
+# Contract ABI
+reward_distributor_abi = [
+    {
+        "inputs": [
+            {"internalType": "address", "name": "user", "type": "address"},
+            {"internalType": "uint256", "name": "score", "type": "uint256"}
+        ],
+        "name": "reward",
+        "outputs": [],
+        "stateMutability": "nonpayable",
+        "type": "function"
+    }
+]
+
+contract = w3.eth.contract(address=REWARD_CONTRACT, abi=reward_distributor_abi)
+
+def send_reward(validated: ValidatedActivity):
+    """Build, sign and broadcast a reward transaction for a validated activity"""
+    if not isinstance(validated, ValidatedActivity):
+        guard_metrics.incr("blocked")
+        raise HTTPException(status_code=422, detail="Blockchain operations not authorized - validation failed")
+
+    nonce = w3.eth.get_transaction_count(sender_address, 'pending')
+
+    txn = contract.functions.reward(validated.wallet_address, validated.score).build_transaction({
+        'from': sender_address,
+        'nonce': nonce,
+        'gas': 300000,
+        'maxFeePerGas': w3.to_wei('25', 'gwei'),
+        'maxPriorityFeePerGas': w3.to_wei('2', 'gwei'),
+        'chainId': w3.eth.chain_id
+    })
+
+    signed_txn = w3.eth.account.sign_transaction(txn, private_key=PRIVATE_KEY)
+    raw_tx = getattr(signed_txn, "rawTransaction", getattr(signed_txn, "raw_transaction", None))
+    if not raw_tx:
+        raise Exception("SignedTransaction has no raw transaction field")
+
+    return w3.eth.send_raw_transaction(raw_tx)
+
+def wait_for_confirmation(tx_hash, timeout: int = 30):
+    """Wait for the reward transaction receipt"""
+    return w3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
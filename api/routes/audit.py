@@ -0,0 +1,40 @@
+# api/routes/audit.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import datetime
+from typing import Optional
+
+from api.auth import require_scope, OAuthScope
+from api.audit_store import get_audit_store
+
+router = APIRouter(tags=["Security Audit"], dependencies=[Depends(require_scope(OAuthScope.ADMIN))])
+
+@router.get("/security-events")
+def list_security_events(
+    wallet_address: Optional[str] = Query(default=None, description="Filter by wallet address (case-insensitive)"),
+    endpoint: Optional[str] = Query(default=None, description="Filter by endpoint, e.g. v1, v2, legacy"),
+    tx_hash: Optional[str] = Query(default=None, description="Filter by transaction hash"),
+    event_type: Optional[str] = Query(default=None, description="VALIDATION_SUCCESS, VALIDATION_FAILED or BLOCKCHAIN_TRANSACTION"),
+    since: Optional[datetime] = Query(default=None, description="Inclusive lower bound on event time"),
+    until: Optional[datetime] = Query(default=None, description="Exclusive upper bound on event time"),
+    before_id: Optional[int] = Query(default=None, description="Return events older than this id (pagination)"),
+    limit: int = Query(default=100, ge=1, le=1000),
+):
+    """Look up persisted security events, newest first"""
+    store = get_audit_store()
+    if store is None:
+        raise HTTPException(status_code=503, detail="Security audit store is disabled")
+
+    events = store.query(
+        wallet_address=wallet_address,
+        endpoint=endpoint,
+        tx_hash=tx_hash,
+        event_type=event_type,
+        since=since,
+        until=until,
+        limit=limit,
+        before_id=before_id,
+    )
+    return {
+        "events": events,
+        "next_before_id": events[-1]["id"] if len(events) == limit else None,
+    }
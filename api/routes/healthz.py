@@ -1,8 +1,34 @@
 from fastapi import APIRouter
 from fastapi.responses import PlainTextResponse
+from api.blockchain_guard import guard_metrics
+from api.security_logging import security_logging_stats
+from api.submission import get_submission_queue
+from api.token_refresh import get_token_refresher
 
 router = APIRouter()
 
 @router.get("/healthz", response_class=PlainTextResponse)
 async def health_check():
     return "ok"
+
+@router.get("/metrics/guard")
+async def guard_status():
+    """Counters for blockchain guard decisions since process start"""
+    return guard_metrics.snapshot()
+
+@router.get("/metrics/security-log")
+async def security_log_status():
+    """Queue depth and drop count for the security log pipeline"""
+    return security_logging_stats()
+
+@router.get("/metrics/submissions")
+async def submission_queue_status():
+    """Counters and backlog of the in-process reward submission queue"""
+    queue = get_submission_queue()
+    return queue.stats() if queue is not None else {"running": False}
+
+@router.get("/metrics/token-refresh")
+async def token_refresh_status():
+    """Last pass of the background OAuth token refresher"""
+    refresher = get_token_refresher()
+    return refresher.status() if refresher is not None else {"scheduled": False}
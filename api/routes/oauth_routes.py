@@ -1,13 +1,21 @@
 # api/routes/oauth_routes.py
 from fastapi import APIRouter, Request, HTTPException, Query, Depends
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+import base64
+import binascii
+import json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from api.auth import OAuthScope, require_scope
 from api.oauth.manager import OAUTH_PROVIDERS
 from api.models.tokens import OAuthToken
-from api.database import get_db
-from api.polling import poll_all_tokens
+from api.database import AsyncReadSessionLocal, get_async_db, get_async_read_db
+from api.poll_scheduler import get_poll_scheduler
+from api.token_store import upsert_token
+from api.validation import normalize_wallet_address
 
 router = APIRouter(tags=["OAuth"])
 
@@ -40,14 +48,14 @@ def oauth_login(
 
 
 @router.get("/callback/{provider}")
-def oauth_callback(
+async def oauth_callback(
     provider: str,
     code: str = Query(..., description="OAuth authorization code"),
     state: str = Query(..., description="OAuth state parameter for CSRF protection"),
     redirect_uri: Optional[str] = Query(default=None, description="OAuth redirect URI"),
     wallet_address: Optional[str] = Query(default=None, description="Optional wallet address to associate"),
     session_key: Optional[str] = Query(default=None, description="Session key for PKCE validation"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     OAuth2.0 callback endpoint with comprehensive security validation.
@@ -64,9 +72,14 @@ def oauth_callback(
             status_code=400, 
             detail="Missing required parameter: wallet_address"
         )
+    try:
+        # Checksum form, so every spelling of an address maps to the same token link
+        wallet_address = normalize_wallet_address(wallet_address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid wallet_address: {e}")
 
     try:
-        tokens = OAUTH_PROVIDERS[provider].exchange_code(
+        tokens = await OAUTH_PROVIDERS[provider].exchange_code(
             code=code,
             state=state,
             redirect_uri=redirect_uri,
@@ -83,22 +96,20 @@ def oauth_callback(
         expires_in = tokens.get("expires_in", 3600)
         expires_at = datetime.utcnow() + timedelta(seconds=expires_in)
 
-        token_entry = OAuthToken(
+        token_id = await upsert_token(
+            db,
             wallet_address=wallet_address,
             provider=provider,
             access_token=access_token,
             refresh_token=tokens.get("refresh_token"),
             expires_at=expires_at
         )
-        db.add(token_entry)
-        db.commit()
-        db.refresh(token_entry)
 
         return {
             "message": "OAuth authorization successful",
             "provider": provider,
             "wallet_address": wallet_address,
-            "token_id": token_entry.id,
+            "token_id": token_id,
             "expires_in": expires_in,
             "expires_at": expires_at.isoformat(),
             "has_refresh_token": bool(tokens.get("refresh_token"))
@@ -110,24 +121,104 @@ def oauth_callback(
         raise HTTPException(status_code=500, detail=f"OAuth callback processing failed: {str(e)}")
 
 @router.post("/test/store-token")
-def test_store_token(db: Session = Depends(get_db)):
-    test_token = OAuthToken(
-        wallet_address="0x123abc",
+async def test_store_token(db: AsyncSession = Depends(get_async_db)):
+    token_id = await upsert_token(
+        db,
+        wallet_address="0x000000000000000000000000000000000123Abc0",
         provider="github",
         access_token="fake_access_token",
         refresh_token="fake_refresh_token",
         expires_at=datetime.utcnow() + timedelta(days=7)
     )
-    db.add(test_token)
-    db.commit()
-    db.refresh(test_token)
-    return {"status": "stored", "id": test_token.id}
+    return {"status": "stored", "id": token_id}
 
-@router.get("/test/list-tokens")
-def list_tokens(db: Session = Depends(get_db)):
-    return db.query(OAuthToken).all()
+# Page size used internally by the NDJSON export
+EXPORT_PAGE_SIZE = 1000
+
+def encode_cursor(token_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"after_id": token_id}).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        after_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["after_id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(after_id, int):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return after_id
+
+def _token_dict(token: OAuthToken) -> Dict[str, Any]:
+    # Never the credentials themselves: this is a bulk export
+    return {
+        "id": token.id,
+        "wallet_address": token.wallet_address,
+        "provider": token.provider,
+        "has_refresh_token": bool(token.refresh_token),
+        "expires_at": token.expires_at.isoformat() if token.expires_at else None,
+        "created_at": token.created_at.isoformat() if token.created_at else None,
+    }
+
+async def _token_page(db: AsyncSession, after_id: int, limit: int, provider: Optional[str],
+                      wallet_address: Optional[str]) -> List[OAuthToken]:
+    query = select(OAuthToken).where(OAuthToken.id > after_id).order_by(OAuthToken.id).limit(limit)
+    if provider is not None:
+        query = query.where(OAuthToken.provider == provider)
+    if wallet_address is not None:
+        query = query.where(OAuthToken.wallet_address == wallet_address)
+    return (await db.execute(query)).scalars().all()
+
+async def _export_tokens(after_id: int, provider: Optional[str], wallet_address: Optional[str]) -> AsyncIterator[str]:
+    """Every matching token as NDJSON, one short read session per page so memory stays flat"""
+    while True:
+        async with AsyncReadSessionLocal() as db:
+            page = await _token_page(db, after_id, EXPORT_PAGE_SIZE, provider, wallet_address)
+        if not page:
+            return
+        yield "".join(json.dumps(_token_dict(token)) + "\n" for token in page)
+        after_id = page[-1].id
 
-@router.get("/test/poll")
-def test_polling():
-    poll_all_tokens()
-    return {"status": "Polling complete"}
+@router.get("/test/list-tokens")
+async def list_tokens(
+    provider: Optional[str] = Query(default=None, description="Only tokens for this provider"),
+    wallet_address: Optional[str] = Query(default=None, description="Only tokens for this wallet"),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    limit: int = Query(default=100, ge=1, le=1000),
+    format: Literal["json", "ndjson"] = Query(default="json", description="ndjson streams every matching token from the cursor on"),
+    db: AsyncSession = Depends(get_async_read_db),
+    user: dict = Depends(require_scope(OAuthScope.ADMIN)),
+):
+    """
+    Stored OAuth token links in id order, a page at a time or as an NDJSON
+    export. Admin only, and access/refresh tokens are never included.
+    """
+    after_id = decode_cursor(cursor) if cursor else 0
+    if wallet_address is not None:
+        try:
+            wallet_address = normalize_wallet_address(wallet_address)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid wallet_address: {e}")
+    if format == "ndjson":
+        return StreamingResponse(_export_tokens(after_id, provider, wallet_address), media_type="application/x-ndjson")
+
+    page = await _token_page(db, after_id, limit, provider, wallet_address)
+    return {
+        "tokens": [_token_dict(token) for token in page],
+        "next_cursor": encode_cursor(page[-1].id) if len(page) == limit else None,
+    }
+
+@router.get("/test/poll", status_code=202)
+async def test_polling():
+    """Start a poll pass in the background (or return the one already running)"""
+    job = get_poll_scheduler().trigger("manual")
+    return {"status": "Polling started", "job": job.to_dict()}
+
+@router.get("/test/poll/status")
+async def test_polling_status():
+    return get_poll_scheduler().status()
+
+@router.get("/test/poll/jobs/{job_id}")
+async def test_polling_job(job_id: str):
+    job = get_poll_scheduler().jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown poll job")
+    return job.to_dict()
@@ -1,43 +1,18 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Depends, Request
-from pydantic import BaseModel
-from api.auth import get_current_user
-from api.rate_limiting import limiter
+from pydantic import BaseModel, Field, ValidationError
+from typing import Any, Dict, List, Optional
+from api.auth import get_current_user, require_batch_submitter
+from api.rate_limiting import charge_items, limiter
 from api.validation import BaseActivitySubmission
 from api.security_logging import log_validation_attempt, log_blockchain_transaction
 from api.blockchain_guard import blockchain_protected
-from web3 import Web3
-from dotenv import load_dotenv
-import os
-from typing import Dict, Any
-
-load_dotenv()
+from api.rewards import send_reward, wait_for_confirmation
+from api.submission import get_submission_queue
+import logging
 
 router = APIRouter(tags=['v2-activities'])
-
-# Load environment
-SEPOLIA_RPC_URL = os.getenv("SEPOLIA_RPC_URL")
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-REWARD_CONTRACT = os.getenv("REWARD_CONTRACT")
-
-# Connect to Web3
-w3 = Web3(Web3.HTTPProvider(SEPOLIA_RPC_URL))
-sender_address = w3.eth.account.from_key(PRIVATE_KEY).address
-
-# Contract ABI
-reward_distributor_abi = [
-    {
-        "inputs": [
-            {"internalType": "address", "name": "user", "type": "address"},
-            {"internalType": "uint256", "name": "score", "type": "uint256"}
-        ],
-        "name": "reward",
-        "outputs": [],
-        "stateMutability": "nonpayable",
-        "type": "function"
-    }
-]
-
-contract = w3.eth.contract(address=REWARD_CONTRACT, abi=reward_distributor_abi)
+logger = logging.getLogger(__name__)
 
 class ActivitySubmission(BaseActivitySubmission):
     pass
@@ -46,6 +21,21 @@ class RewardResponse(BaseModel):
     txHash: str
     status: str
 
+MAX_BATCH_SIZE = 500
+
+class BatchSubmission(BaseModel):
+    # Items are validated one by one so a bad reading does not reject the whole batch
+    activities: List[Dict[str, Any]] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # queued, duplicate, rejected or queue_full
+    detail: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    accepted: int
+    results: List[BatchItemResult]
+
 @router.post("/submit", response_model=RewardResponse)
 @limiter.limit("1000/hour")
 @blockchain_protected
@@ -59,52 +49,63 @@ async def submit_activity(
     try:
         log_validation_attempt("v2", activity.wallet_address, activity.value, True, activity.details)
         
-        print(f"[V2 Submit] Wallet: {activity.wallet_address}")
-        print(f"[V2 Submit] Activity Type: {activity.activity_type}")
-        print(f"[V2 Submit] Value: {activity.value} kWh")
-        print(f"[V2 Submit] Details: {activity.details}")
+        logger.debug("[V2 Submit] wallet=%s type=%s kwh=%s details=%s",
+                     activity.wallet_address, activity.activity_type, activity.value, activity.details)
 
-        guard.allow_blockchain()
-        
-        kwh_scaled = int(activity.value * 100)
-        
-        nonce = w3.eth.get_transaction_count(sender_address, 'pending')
-        print(f"[V2 Submit] Nonce (pending): {nonce}")
-
-        txn = contract.functions.reward(activity.wallet_address, kwh_scaled).build_transaction({
-            'from': sender_address,
-            'nonce': nonce,
-            'gas': 300000,
-            'maxFeePerGas': w3.to_wei('25', 'gwei'),
-            'maxPriorityFeePerGas': w3.to_wei('2', 'gwei'),
-            'chainId': w3.eth.chain_id
-        })
-
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key=PRIVATE_KEY)
-        raw_tx = getattr(signed_txn, "rawTransaction", getattr(signed_txn, "raw_transaction", None))
-        if not raw_tx:
-            raise Exception("SignedTransaction has no raw transaction field")
-
-        tx_hash = w3.eth.send_raw_transaction(raw_tx)
-        print(f"[V2 Submit] Submitted tx hash: {tx_hash.hex()}")
+        validated = guard.allow_blockchain()
+        tx_hash = send_reward(validated)
+        logger.debug("[V2 Submit] Submitted tx hash: %s", tx_hash.hex())
         log_blockchain_transaction("v2", activity.wallet_address, activity.value, tx_hash.hex(), True)
 
         try:
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=30)
-            print(f"[V2 Submit] Mined in block: {receipt.blockNumber}")
+            receipt = wait_for_confirmation(tx_hash, timeout=30)
+            logger.debug("[V2 Submit] Mined in block: %s", receipt.blockNumber)
             return {"txHash": tx_hash.hex(), "status": "confirmed"}
         except Exception as e:
-            print(f"[V2 Submit] Tx not confirmed within timeout: {e}")
+            logger.info("[V2 Submit] Tx not confirmed within timeout: %s", e)
             return {"txHash": tx_hash.hex(), "status": "pending"}
 
     except HTTPException:
         log_validation_attempt("v2", getattr(activity, 'wallet_address', 'unknown'), getattr(activity, 'value', 0), False)
         raise
     except ValueError as e:
-        print(f"[V2 Submit] Validation Error: {str(e)}")
+        logger.warning("[V2 Submit] Validation Error: %s", e)
         log_validation_attempt("v2", getattr(activity, 'wallet_address', 'unknown'), getattr(activity, 'value', 0), False)
         raise HTTPException(status_code=422, detail=f"Validation error: {str(e)}")
     except Exception as e:
-        print(f"[V2 Submit] Error: {str(e)}")
+        logger.error("[V2 Submit] Error: %s", e)
         log_blockchain_transaction("v2", getattr(activity, 'wallet_address', 'unknown'), getattr(activity, 'value', 0), "failed", False)
         raise HTTPException(status_code=500, detail=f"Transaction failed: {str(e)}")
+
+@router.post("/submit-batch", response_model=BatchResponse, status_code=202)
+@limiter.limit("1000/hour")
+async def submit_activity_batch(
+    request: Request,
+    batch: BatchSubmission,
+    user: dict = Depends(require_batch_submitter)
+):
+    """
+    Validate and queue up to MAX_BATCH_SIZE activities; rewards are sent
+    asynchronously. Only the poller key and admin callers may use it, and
+    every item counts against BATCH_ITEM_RATE_LIMIT.
+    """
+    queue = get_submission_queue()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Submission queue is not running")
+    charge_items(request, len(batch.activities))
+
+    results = []
+    for index, item in enumerate(batch.activities):
+        try:
+            activity = ActivitySubmission.model_validate(item)
+            status = queue.submit_nowait(activity, "v2-batch")
+            results.append(BatchItemResult(index=index, status=status))
+        except ValidationError as e:
+            results.append(BatchItemResult(index=index, status="rejected", detail=str(e.errors()[0]["msg"])))
+        except HTTPException as e:
+            results.append(BatchItemResult(index=index, status="rejected", detail=str(e.detail)))
+        except asyncio.QueueFull:
+            results.append(BatchItemResult(index=index, status="queue_full"))
+
+    accepted = sum(result.status in ("queued", "duplicate") for result in results)
+    return BatchResponse(accepted=accepted, results=results)
@@ -1,35 +1,223 @@
+import json
 import logging
-from datetime import datetime
-from typing import Dict, Any
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+
+from api.audit_store import AuditStoreHandler, get_audit_store
+
+SECURITY_LOG_FILE = os.getenv("SECURITY_LOG_FILE")  # unset -> JSON lines on stdout
+SECURITY_LOG_MAX_BYTES = int(os.getenv("SECURITY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SECURITY_LOG_BACKUP_COUNT = int(os.getenv("SECURITY_LOG_BACKUP_COUNT", "5"))
+SECURITY_LOG_QUEUE_SIZE = int(os.getenv("SECURITY_LOG_QUEUE_SIZE", "10000"))
+SECURITY_LOG_BATCH_SIZE = int(os.getenv("SECURITY_LOG_BATCH_SIZE", "100"))
+SECURITY_LOG_FLUSH_INTERVAL = float(os.getenv("SECURITY_LOG_FLUSH_INTERVAL", "1.0"))
+# Fraction of success events written to the log file/stdout; failures are always kept, and the
+# audit store records every event regardless
+SECURITY_LOG_SUCCESS_SAMPLE_RATE = float(os.getenv("SECURITY_LOG_SUCCESS_SAMPLE_RATE", "1.0"))
 
 security_logger = logging.getLogger('silvanus_security')
 security_logger.setLevel(logging.INFO)
+security_logger.propagate = False
+
+class JsonLinesFormatter(logging.Formatter):
+    """Render a security record's structured event as one JSON line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        event = getattr(record, "event", None) or {"message": record.getMessage()}
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "event_type": record.msg,
+            **event,
+        }
+        return json.dumps(payload, default=str)
+
+class SuccessSamplingFilter(logging.Filter):
+    """Let through a random fraction of INFO (success) records and every warning or error"""
+
+    def __init__(self, rate: float = SECURITY_LOG_SUCCESS_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.INFO or self.rate >= 1.0:
+            return True
+        return random.random() < self.rate
+
+class _NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueue records as-is and drop them when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The structured event travels with the record; formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class SecurityLogListener(threading.Thread):
+    """Drain the security log queue and write records to handlers in batches"""
+
+    _STOP = object()
+
+    def __init__(self, log_queue: queue.Queue, handlers: List[logging.Handler],
+                 batch_size: int = SECURITY_LOG_BATCH_SIZE,
+                 flush_interval: float = SECURITY_LOG_FLUSH_INTERVAL):
+        super().__init__(name="security-log-listener", daemon=True)
+        self.queue = log_queue
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            try:
+                record = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if record is self._STOP:
+                break
+
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is self._STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            for handler in self.handlers:
+                try:
+                    write_batch(handler, batch)
+                except Exception:
+                    handler.handleError(batch[-1])
+
+    def stop(self, timeout: Optional[float] = 5.0):
+        self.queue.put(self._STOP)
+        self.join(timeout)
+
+def write_batch(handler: logging.Handler, records: List[logging.LogRecord]):
+    """Write a batch of records with a single write and flush where the handler supports it"""
+    if hasattr(handler, "emit_batch"):
+        handler.emit_batch(records)
+        return
+    if not isinstance(handler, logging.StreamHandler):
+        for record in records:
+            handler.handle(record)
+        return
+
+    # handler.handle() would apply the handler's filters; the batched write has to do it itself
+    records = [record for record in records if handler.filter(record)]
+    if not records:
+        return
+    data = "".join(handler.format(record) + "\n" for record in records)
+    with handler.lock:
+        if isinstance(handler, logging.handlers.RotatingFileHandler):
+            if handler.stream is None:
+                handler.stream = handler._open()
+            if handler.maxBytes > 0 and handler.stream.tell() + len(data) >= handler.maxBytes:
+                handler.doRollover()
+        handler.stream.write(data)
+        handler.flush()
+
+_log_queue: queue.Queue = queue.Queue(maxsize=SECURITY_LOG_QUEUE_SIZE)
+_queue_handler = _NonBlockingQueueHandler(_log_queue)
+security_logger.addHandler(_queue_handler)
+_listener: Optional[SecurityLogListener] = None
+_listener_lock = threading.Lock()
+
+def _default_handlers() -> List[logging.Handler]:
+    if SECURITY_LOG_FILE:
+        # ./logs is not tracked, so a fresh checkout has no directory to write into
+        os.makedirs(os.path.dirname(SECURITY_LOG_FILE) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            SECURITY_LOG_FILE,
+            maxBytes=SECURITY_LOG_MAX_BYTES,
+            backupCount=SECURITY_LOG_BACKUP_COUNT,
+            encoding="utf-8",
+        )
+    else:
+        handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonLinesFormatter())
+    handler.addFilter(SuccessSamplingFilter())
+    handlers = [handler]
+
+    store = get_audit_store()
+    if store is not None:
+        handlers.append(AuditStoreHandler(store))
+    return handlers
+
+def start_security_logging(handlers: Optional[List[logging.Handler]] = None):
+    """Start the background listener that writes queued security events"""
+    global _listener
+    with _listener_lock:
+        if _listener is not None and _listener.is_alive():
+            return _listener
+        _listener = SecurityLogListener(_log_queue, handlers or _default_handlers())
+        _listener.start()
+        return _listener
+
+def stop_security_logging():
+    """Flush queued security events and stop the listener"""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def security_logging_stats() -> Dict[str, Any]:
+    return {
+        "queued": _log_queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "listener_running": _listener is not None and _listener.is_alive(),
+        "success_sample_rate": SECURITY_LOG_SUCCESS_SAMPLE_RATE,
+    }
 
 def log_validation_attempt(endpoint: str, wallet_address: str, value: float, success: bool, details: Dict[str, Any] = None):
     """Log all validation attempts for security monitoring"""
-    log_data = {
-        'timestamp': datetime.now().isoformat(),
+    event = {
         'endpoint': endpoint,
         'wallet_address': wallet_address,
         'value': value,
         'validation_success': success,
         'details': details or {}
     }
-    
+
     if success:
-        security_logger.info(f"VALIDATION_SUCCESS: {log_data}")
+        security_logger.info("VALIDATION_SUCCESS", extra={"event": event})
     else:
-        security_logger.warning(f"VALIDATION_FAILED: {log_data}")
+        security_logger.warning("VALIDATION_FAILED", extra={"event": event})
 
 def log_blockchain_transaction(endpoint: str, wallet_address: str, value: float, tx_hash: str, success: bool):
     """Log blockchain transactions for security monitoring"""
-    log_data = {
-        'timestamp': datetime.now().isoformat(),
+    event = {
         'endpoint': endpoint,
         'wallet_address': wallet_address,
         'value': value,
         'tx_hash': tx_hash,
         'transaction_success': success
     }
-    
-    security_logger.info(f"BLOCKCHAIN_TRANSACTION: {log_data}")
+
+    if success:
+        security_logger.info("BLOCKCHAIN_TRANSACTION", extra={"event": event})
+    else:
+        security_logger.warning("BLOCKCHAIN_TRANSACTION", extra={"event": event})
@@ -0,0 +1,165 @@
+# api/submission.py
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from sqlalchemy import delete
+
+from api.blockchain_guard import BlockchainGuard, ValidatedActivity
+from api.database import AsyncSessionLocal
+from api.models.poll_outbox import PollOutbox
+from api.security_logging import log_validation_attempt, log_blockchain_transaction
+from api.validation import BaseActivitySubmission
+
+logger = logging.getLogger(__name__)
+
+SUBMISSION_QUEUE_SIZE = int(os.getenv("SUBMISSION_QUEUE_SIZE", "10000"))
+# Idempotency keys remembered per process, so a retried reading is not rewarded twice
+SUBMISSION_DEDUP_SIZE = int(os.getenv("SUBMISSION_DEDUP_SIZE", "100000"))
+SUBMISSION_DRAIN_TIMEOUT = float(os.getenv("SUBMISSION_DRAIN_TIMEOUT", "30"))
+
+class QueuedSubmission(NamedTuple):
+    validated: ValidatedActivity
+    source: str
+    idempotency_key: Optional[str]
+
+class SubmissionQueue:
+    """
+    In-process reward submission service. Callers validate and enqueue; a
+    single sender task broadcasts the reward transactions in order, so
+    nonces are never contended and callers never wait on the chain.
+    """
+
+    def __init__(self, maxsize: int = SUBMISSION_QUEUE_SIZE, dedup_size: int = SUBMISSION_DEDUP_SIZE):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dedup_size = dedup_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._sender: Optional[asyncio.Task] = None
+        self._counts = {"queued": 0, "duplicates": 0, "rejected": 0, "queue_full": 0, "sent": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._sender is not None and not self._sender.done()
+
+    def _remember(self, key: str) -> bool:
+        """Record an idempotency key; False if it was already seen"""
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            return False
+        self._seen[key] = None
+        if len(self._seen) > self.dedup_size:
+            self._seen.popitem(last=False)
+        return True
+
+    def submit_nowait(self, activity: BaseActivitySubmission, source: str) -> str:
+        """
+        Validate an activity and queue its reward. Returns "queued" or
+        "duplicate"; raises asyncio.QueueFull when the sender is saturated and
+        HTTPException when the guard rejects the activity.
+        """
+        key = activity.details.get("idempotency_key")
+        if key is not None and key in self._seen:
+            self._counts["duplicates"] += 1
+            return "duplicate"
+
+        guard = BlockchainGuard()
+        try:
+            guard.validate_activity(activity)
+            validated = guard.allow_blockchain()
+        except Exception:
+            self._counts["rejected"] += 1
+            log_validation_attempt(source, activity.wallet_address, activity.value, False, activity.details)
+            raise
+
+        try:
+            self.queue.put_nowait(QueuedSubmission(validated, source, key))
+        except asyncio.QueueFull:
+            self._counts["queue_full"] += 1
+            raise
+
+        if key is not None:
+            self._remember(key)
+        self._counts["queued"] += 1
+        log_validation_attempt(source, activity.wallet_address, activity.value, True, activity.details)
+        return "queued"
+
+    async def _send(self, item: QueuedSubmission):
+        # Imported lazily: api.rewards connects to the chain at import time
+        from api.rewards import send_reward
+
+        validated = item.validated
+        try:
+            tx_hash = await asyncio.to_thread(send_reward, validated)
+        except Exception as e:
+            self._counts["failed"] += 1
+            logger.error("Reward submission failed for %s: %s", validated.wallet_address, e)
+            log_blockchain_transaction(item.source, validated.wallet_address, validated.value, "failed", False)
+            if item.idempotency_key is not None:
+                # Let the poller's redelivery of this reading through instead of reporting a duplicate
+                self._seen.pop(item.idempotency_key, None)
+            return
+        self._counts["sent"] += 1
+        log_blockchain_transaction(item.source, validated.wallet_address, validated.value, tx_hash.hex(), True)
+        if item.idempotency_key is not None:
+            await self._mark_sent(item.idempotency_key)
+
+    async def _mark_sent(self, key: str):
+        """The reward is on its way to the chain, so the poller no longer needs to redeliver it"""
+        try:
+            async with AsyncSessionLocal() as db, db.begin():
+                await db.execute(delete(PollOutbox).where(PollOutbox.idempotency_key == key))
+        except Exception as e:
+            # Redelivery of the row is answered as a duplicate while this process remembers the key
+            logger.warning("Could not clear pending reading %s: %s", key, e)
+
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            try:
+                if item is None:
+                    return
+                await self._send(item)
+            finally:
+                self.queue.task_done()
+
+    def start(self):
+        if not self.running:
+            self._sender = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = SUBMISSION_DRAIN_TIMEOUT):
+        """Send what is already queued, then stop the sender"""
+        if not self.running:
+            return
+        await self.queue.put(None)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._sender), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Submission queue stopped with %s rewards unsent", self.queue.qsize())
+            self._sender.cancel()
+        self._sender = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._counts, "pending": self.queue.qsize(), "running": self.running}
+
+_submission_queue: Optional[SubmissionQueue] = None
+
+def get_submission_queue() -> Optional[SubmissionQueue]:
+    """The running in-process queue, or None outside the API process"""
+    if _submission_queue is not None and _submission_queue.running:
+        return _submission_queue
+    return None
+
+async def start_submission_queue() -> SubmissionQueue:
+    global _submission_queue
+    if _submission_queue is None:
+        _submission_queue = SubmissionQueue()
+    _submission_queue.start()
+    return _submission_queue
+
+async def stop_submission_queue():
+    global _submission_queue
+    if _submission_queue is not None:
+        await _submission_queue.stop()
+        _submission_queue = None
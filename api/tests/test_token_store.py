@@ -0,0 +1,98 @@
+"""
+Tests for OAuth token upserts in api.token_store.
+
+Run from the repository root: python -m pytest api/tests
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from api import token_store
+from api.database import Base
+from api.models.tokens import OAuthToken
+from api.models.token_refresh_state import TokenRefreshState
+
+WALLET = "0x000000000000000000000000000000000123abc0"
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """URL of an empty SQLite database file for one test."""
+    return f"sqlite+aiosqlite:///{tmp_path / 'tokens.db'}"
+
+
+@pytest.fixture(params=[True, False], ids=["on-conflict", "select-and-update"])
+def upsert_path(request, monkeypatch):
+    """Run each test through the dialect upsert and the fallback used while duplicates remain."""
+    monkeypatch.setattr(token_store, "unique_index_ready", request.param)
+    return request.param
+
+
+async def _session_factory(url):
+    engine = create_async_engine(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+class TestUpsertToken:
+    """Re-linking a wallet through upsert_token."""
+
+    @pytest.mark.asyncio
+    async def test_relink_keeps_id_and_clears_refresh_backoff(self, database_url, upsert_path):
+        """A re-link keeps the token id but starts without the old link's failed refreshes."""
+        engine, Session = await _session_factory(database_url)
+        try:
+            async with Session() as db:
+                token_id = await token_store.upsert_token(
+                    db, WALLET, "github", "old-access", "old-refresh", datetime.utcnow()
+                )
+                db.add(TokenRefreshState(
+                    token_id=token_id,
+                    consecutive_failures=5,
+                    next_attempt_at=datetime.utcnow() + timedelta(hours=6),
+                    last_error="invalid_grant",
+                ))
+                await db.commit()
+
+            async with Session() as db:
+                relinked_id = await token_store.upsert_token(
+                    db, WALLET.upper().replace("0X", "0x"), "github", "new-access", "new-refresh",
+                    datetime.utcnow() + timedelta(hours=1),
+                )
+
+            async with Session() as db:
+                assert relinked_id == token_id
+                assert (await db.get(TokenRefreshState, token_id)) is None
+                token = (await db.execute(select(OAuthToken))).scalar_one()
+                assert token.access_token == "new-access"
+                assert token.refresh_token == "new-refresh"
+        finally:
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_relink_leaves_other_tokens_backoff(self, database_url, upsert_path):
+        """Only the re-linked token's refresh state is cleared."""
+        engine, Session = await _session_factory(database_url)
+        try:
+            async with Session() as db:
+                token_id = await token_store.upsert_token(db, WALLET, "github", "a", "r", None)
+                other_id = await token_store.upsert_token(db, WALLET, "solaredge", "b", "s", None)
+                db.add(TokenRefreshState(
+                    token_id=other_id, consecutive_failures=2,
+                    next_attempt_at=datetime.utcnow() + timedelta(minutes=2),
+                ))
+                await db.commit()
+
+                await token_store.upsert_token(db, WALLET, "github", "a2", None, None)
+
+            async with Session() as db:
+                assert (await db.get(TokenRefreshState, other_id)) is not None
+                token = await db.get(OAuthToken, token_id)
+                # Providers that do not rotate refresh tokens omit them on re-link
+                assert token.refresh_token == "r"
+        finally:
+            await engine.dispose()
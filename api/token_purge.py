@@ -0,0 +1,130 @@
+# api/token_purge.py
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import delete, insert, literal, or_, select, text
+
+from api.database import SessionLocal, engine
+from api.models.tokens import OAuthToken
+from api.models.token_archive import ArchivedToken
+from api.models.token_refresh_state import TokenRefreshState
+from api.models.poll_watermark import PollWatermark
+from api.models.poll_schedule import PollSchedule
+from api.oauth.manager import OAUTH_PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PURGE_ENABLED = os.getenv("TOKEN_PURGE_ENABLED", "false").lower() in ("1", "true", "yes")
+TOKEN_PURGE_INTERVAL = int(os.getenv("TOKEN_PURGE_INTERVAL", "86400"))
+# How long a token must have been expired before it counts as dead
+TOKEN_PURGE_GRACE_DAYS = int(os.getenv("TOKEN_PURGE_GRACE_DAYS", "7"))
+# Refreshable tokens are only dead once background refresh has given up on them this many times
+TOKEN_PURGE_MAX_REFRESH_FAILURES = int(os.getenv("TOKEN_PURGE_MAX_REFRESH_FAILURES", "5"))
+TOKEN_PURGE_BATCH_SIZE = int(os.getenv("TOKEN_PURGE_BATCH_SIZE", "500"))
+# Keep wallet/provider/expiry of purged links in oauth_tokens_archive
+TOKEN_PURGE_ARCHIVE = os.getenv("TOKEN_PURGE_ARCHIVE", "true").lower() in ("1", "true", "yes")
+TOKEN_PURGE_VACUUM = os.getenv("TOKEN_PURGE_VACUUM", "true").lower() in ("1", "true", "yes")
+
+def _dead_tokens(now: datetime, limit: int):
+    """Tokens expired for longer than the grace period that cannot be refreshed, oldest first"""
+    refreshable = [name for name, provider in OAUTH_PROVIDERS.items() if provider.supports_refresh]
+    return (
+        select(OAuthToken.id)
+        .outerjoin(TokenRefreshState, TokenRefreshState.token_id == OAuthToken.id)
+        .where(
+            OAuthToken.expires_at < now - timedelta(days=TOKEN_PURGE_GRACE_DAYS),
+            or_(
+                OAuthToken.refresh_token.is_(None),
+                OAuthToken.provider.not_in(refreshable),
+                TokenRefreshState.consecutive_failures >= TOKEN_PURGE_MAX_REFRESH_FAILURES,
+            ),
+        )
+        .order_by(OAuthToken.expires_at)
+        .limit(limit)
+    )
+
+def purge_dead_tokens(batch_size: int = TOKEN_PURGE_BATCH_SIZE, archive: bool = TOKEN_PURGE_ARCHIVE) -> Dict[str, int]:
+    """
+    Delete dead tokens and their polling state, one short transaction per
+    batch so the API and pollers are never locked out for long.
+    """
+    now = datetime.utcnow()
+    purged = archived = 0
+    while True:
+        with SessionLocal() as db, db.begin():
+            ids = db.execute(_dead_tokens(now, batch_size)).scalars().all()
+            if not ids:
+                break
+            if archive:
+                archived += db.execute(insert(ArchivedToken).from_select(
+                    ["wallet_address", "provider", "expires_at", "created_at", "archived_at"],
+                    select(OAuthToken.wallet_address, OAuthToken.provider, OAuthToken.expires_at,
+                           OAuthToken.created_at, literal(now)).where(OAuthToken.id.in_(ids)),
+                )).rowcount
+            for model in (PollWatermark, PollSchedule, TokenRefreshState):
+                db.execute(delete(model).where(model.token_id.in_(ids)))
+            purged += db.execute(delete(OAuthToken).where(OAuthToken.id.in_(ids))).rowcount
+        logger.info("Purged %s dead tokens so far", purged)
+    return {"tokens_purged": purged, "tokens_archived": archived}
+
+def _storage_size(conn) -> Optional[int]:
+    if engine.dialect.name == "sqlite":
+        return conn.execute(text("PRAGMA page_count")).scalar() * conn.execute(text("PRAGMA page_size")).scalar()
+    if engine.dialect.name == "postgresql":
+        return conn.execute(text("SELECT pg_total_relation_size('oauth_tokens')")).scalar()
+    return None
+
+def compact_storage(vacuum: bool = TOKEN_PURGE_VACUUM) -> Dict[str, Any]:
+    """
+    Refresh planner statistics and, if `vacuum`, hand freed pages back: a full
+    VACUUM on SQLite (exclusive while it runs) or a plain VACUUM of
+    oauth_tokens on Postgres. Sizes are of the SQLite file or the Postgres table.
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        before = _storage_size(conn)
+        if engine.dialect.name == "postgresql":
+            conn.execute(text("VACUUM (ANALYZE) oauth_tokens" if vacuum else "ANALYZE oauth_tokens"))
+        elif engine.dialect.name == "sqlite":
+            if vacuum:
+                conn.execute(text("VACUUM"))
+            conn.execute(text("ANALYZE"))
+        after = _storage_size(conn)
+    reclaimed = before - after if before is not None and after is not None else None
+    return {"vacuumed": vacuum, "bytes_before": before, "bytes_after": after, "bytes_reclaimed": reclaimed}
+
+def run_token_purge(batch_size: int = TOKEN_PURGE_BATCH_SIZE, archive: bool = TOKEN_PURGE_ARCHIVE,
+                    vacuum: bool = TOKEN_PURGE_VACUUM) -> Dict[str, Any]:
+    report = purge_dead_tokens(batch_size, archive)
+    # Nothing was freed, so there is nothing for VACUUM to hand back
+    report.update(compact_storage(vacuum and report["tokens_purged"] > 0))
+    logger.info("Token purge: %s", report)
+    return report
+
+_scheduler: Optional[AsyncIOScheduler] = None
+
+async def _scheduled_purge():
+    try:
+        await asyncio.to_thread(run_token_purge)
+    except Exception as e:
+        logger.exception("Token purge failed: %s", e)
+
+async def start_token_purge():
+    global _scheduler
+    if TOKEN_PURGE_ENABLED and _scheduler is None:
+        _scheduler = AsyncIOScheduler()
+        _scheduler.add_job(
+            _scheduled_purge, "interval",
+            seconds=TOKEN_PURGE_INTERVAL,
+            id="token_purge", max_instances=1, coalesce=True,
+        )
+        _scheduler.start()
+
+async def stop_token_purge():
+    global _scheduler
+    if _scheduler is not None:
+        _scheduler.shutdown(wait=False)
+        _scheduler = None
@@ -0,0 +1,224 @@
+# api/token_refresh.py
+import asyncio
+import logging
+import os
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import and_, delete, or_, select, update
+
+from api.database import AsyncSessionLocal
+from api.models.tokens import OAuthToken
+from api.models.token_refresh_state import TokenRefreshState
+from api.oauth.manager import OAUTH_PROVIDERS
+
+logger = logging.getLogger(__name__)
+
+TOKEN_REFRESH_ENABLED = os.getenv("TOKEN_REFRESH_ENABLED", "false").lower() in ("1", "true", "yes")
+TOKEN_REFRESH_INTERVAL = int(os.getenv("TOKEN_REFRESH_INTERVAL", "60"))
+# Tokens expiring within this many seconds are refreshed ahead of time
+TOKEN_REFRESH_WINDOW = int(os.getenv("TOKEN_REFRESH_WINDOW", "900"))
+TOKEN_REFRESH_CONCURRENCY = int(os.getenv("TOKEN_REFRESH_CONCURRENCY", "8"))
+TOKEN_REFRESH_BATCH_SIZE = int(os.getenv("TOKEN_REFRESH_BATCH_SIZE", "200"))
+TOKEN_REFRESH_BACKOFF_BASE = int(os.getenv("TOKEN_REFRESH_BACKOFF_BASE", "60"))
+TOKEN_REFRESH_MAX_BACKOFF = int(os.getenv("TOKEN_REFRESH_MAX_BACKOFF", "21600"))
+
+class RefreshTarget(NamedTuple):
+    id: int
+    provider: str
+    refresh_token: str
+    expires_at: datetime
+
+@dataclass
+class RefreshStats:
+    selected: int = 0
+    refreshed: int = 0
+    failed: int = 0
+    # Refreshed concurrently by someone else (e.g. refresh_oauth_token) while this pass was in flight
+    superseded: int = 0
+
+    def summary(self) -> Dict[str, int]:
+        return asdict(self)
+
+def refreshable_providers() -> List[str]:
+    return [name for name, provider in OAUTH_PROVIDERS.items() if provider.supports_refresh]
+
+def refresh_backoff(consecutive_failures: int) -> int:
+    return min(TOKEN_REFRESH_BACKOFF_BASE * 2 ** (consecutive_failures - 1), TOKEN_REFRESH_MAX_BACKOFF)
+
+async def _due_batch(providers: List[str], now: datetime, after: Optional[RefreshTarget],
+                     limit: int) -> List[RefreshTarget]:
+    """Next page of tokens expiring before the horizon, walking the expires_at index in order"""
+    query = (
+        select(OAuthToken.id, OAuthToken.provider, OAuthToken.refresh_token, OAuthToken.expires_at)
+        .outerjoin(TokenRefreshState, TokenRefreshState.token_id == OAuthToken.id)
+        .where(
+            OAuthToken.expires_at <= now + timedelta(seconds=TOKEN_REFRESH_WINDOW),
+            OAuthToken.refresh_token.isnot(None),
+            OAuthToken.provider.in_(providers),
+            or_(TokenRefreshState.next_attempt_at.is_(None), TokenRefreshState.next_attempt_at <= now),
+        )
+        .order_by(OAuthToken.expires_at, OAuthToken.id)
+        .limit(limit)
+    )
+    if after is not None:
+        query = query.where(or_(
+            OAuthToken.expires_at > after.expires_at,
+            and_(OAuthToken.expires_at == after.expires_at, OAuthToken.id > after.id),
+        ))
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(query)).all()
+    return [RefreshTarget(*row) for row in rows]
+
+async def _refresh(target: RefreshTarget, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+    """Call the provider; returns the new tokens, or an exception for the failure record"""
+    async with semaphore:
+        try:
+            return await OAUTH_PROVIDERS[target.provider].refresh_token(target.refresh_token)
+        except Exception as e:
+            return e
+
+async def _record(batch: List[RefreshTarget], results: List[Any], stats: RefreshStats):
+    """Write one batch of outcomes in a single transaction"""
+    now = datetime.utcnow()
+    failures = {
+        target.id: result for target, result in zip(batch, results) if isinstance(result, Exception)
+    }
+    async with AsyncSessionLocal() as db:
+        for target, result in zip(batch, results):
+            if target.id in failures:
+                continue
+            values = {
+                "access_token": result["access_token"],
+                "expires_at": now + timedelta(seconds=result.get("expires_in", 3600)),
+            }
+            if result.get("refresh_token"):
+                values["refresh_token"] = result["refresh_token"]
+            # Only replace the refresh token this pass used, so a concurrent refresh is not overwritten
+            updated = await db.execute(
+                update(OAuthToken)
+                .where(OAuthToken.id == target.id, OAuthToken.refresh_token == target.refresh_token)
+                .values(**values)
+            )
+            if updated.rowcount:
+                stats.refreshed += 1
+            else:
+                stats.superseded += 1
+
+        succeeded = [target.id for target in batch if target.id not in failures]
+        if succeeded:
+            await db.execute(delete(TokenRefreshState).where(TokenRefreshState.token_id.in_(succeeded)))
+
+        if failures:
+            existing = {
+                state.token_id: state for state in (await db.execute(
+                    select(TokenRefreshState).where(TokenRefreshState.token_id.in_(list(failures)))
+                )).scalars()
+            }
+            for token_id, error in failures.items():
+                state = existing.get(token_id)
+                if state is None:
+                    state = TokenRefreshState(token_id=token_id, consecutive_failures=0)
+                    db.add(state)
+                state.consecutive_failures += 1
+                state.next_attempt_at = now + timedelta(seconds=refresh_backoff(state.consecutive_failures))
+                state.last_error = str(error)[:500]
+                logger.warning("Refresh of token %s failed (%s in a row): %s",
+                               token_id, state.consecutive_failures, error)
+            stats.failed += len(failures)
+        await db.commit()
+
+async def refresh_expiring_tokens(concurrency: int = TOKEN_REFRESH_CONCURRENCY,
+                                  batch_size: int = TOKEN_REFRESH_BATCH_SIZE) -> RefreshStats:
+    """
+    One pass: refresh every token that expires within TOKEN_REFRESH_WINDOW and
+    is not backing off, at most `concurrency` provider calls at a time.
+    """
+    stats = RefreshStats()
+    providers = refreshable_providers()
+    if not providers:
+        return stats
+
+    now = datetime.utcnow()
+    semaphore = asyncio.Semaphore(concurrency)
+    after = None
+    # A token whose new lifetime is shorter than the window would reappear further along the index
+    seen = set()
+    while True:
+        page = await _due_batch(providers, now, after, batch_size)
+        if not page:
+            break
+        after = page[-1]
+        batch = [target for target in page if target.id not in seen]
+        seen.update(target.id for target in batch)
+        if not batch:
+            continue
+        stats.selected += len(batch)
+        results = await asyncio.gather(*(_refresh(target, semaphore) for target in batch))
+        await _record(batch, results, stats)
+    if stats.selected:
+        logger.info("Token refresh pass: %s", stats.summary())
+    return stats
+
+class TokenRefresher:
+    """Runs refresh passes on an interval in the background of the running event loop"""
+
+    def __init__(self, interval: int = TOKEN_REFRESH_INTERVAL, concurrency: int = TOKEN_REFRESH_CONCURRENCY):
+        self.interval = interval
+        self.concurrency = concurrency
+        self.last_run: Optional[datetime] = None
+        self.last_stats: Optional[RefreshStats] = None
+        self._scheduler: Optional[AsyncIOScheduler] = None
+
+    async def run_once(self) -> RefreshStats:
+        try:
+            self.last_stats = await refresh_expiring_tokens(self.concurrency)
+        except Exception as e:
+            logger.exception("Token refresh pass failed: %s", e)
+        self.last_run = datetime.utcnow()
+        return self.last_stats
+
+    def start(self):
+        if self._scheduler is not None:
+            return
+        self._scheduler = AsyncIOScheduler()
+        self._scheduler.add_job(
+            self.run_once, "interval",
+            seconds=self.interval,
+            id="token_refresh", max_instances=1, coalesce=True,
+            next_run_time=datetime.now(),
+        )
+        self._scheduler.start()
+
+    def stop(self):
+        if self._scheduler is not None:
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "scheduled": self._scheduler is not None,
+            "interval_seconds": self.interval,
+            "window_seconds": TOKEN_REFRESH_WINDOW,
+            "last_run": self.last_run.isoformat() if self.last_run else None,
+            "last_stats": self.last_stats.summary() if self.last_stats else None,
+        }
+
+_token_refresher: Optional[TokenRefresher] = None
+
+def get_token_refresher() -> Optional[TokenRefresher]:
+    return _token_refresher
+
+async def start_token_refresher():
+    global _token_refresher
+    if TOKEN_REFRESH_ENABLED and _token_refresher is None:
+        _token_refresher = TokenRefresher()
+        _token_refresher.start()
+
+async def stop_token_refresher():
+    global _token_refresher
+    if _token_refresher is not None:
+        _token_refresher.stop()
+        _token_refresher = None
@@ -0,0 +1,189 @@
+# api/token_store.py
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.database import SessionLocal, engine
+from api.models.tokens import OAuthToken
+from api.models.poll_watermark import PollWatermark
+from api.models.poll_schedule import PollSchedule
+from api.models.token_refresh_state import TokenRefreshState
+from api.validation import normalize_wallet_address
+
+logger = logging.getLogger(__name__)
+
+UNIQUE_INDEX = "uq_oauth_tokens_wallet_provider"
+_CREATE_UNIQUE_INDEX = f"CREATE UNIQUE INDEX IF NOT EXISTS {UNIQUE_INDEX} ON oauth_tokens (wallet_address, provider)"
+# Used by the background refresher's expiry-window scan
+_CREATE_EXPIRY_INDEX = "CREATE INDEX IF NOT EXISTS ix_oauth_tokens_expires_at ON oauth_tokens (expires_at)"
+
+# False while an older database still holds duplicates; upserts then fall back to select-and-update
+unique_index_ready = True
+
+def ensure_token_indexes() -> bool:
+    """
+    Add indexes introduced after oauth_tokens was first created. Returns False
+    if the unique (wallet_address, provider) index is blocked by duplicates.
+    """
+    global unique_index_ready
+    with engine.begin() as conn:
+        conn.execute(text(_CREATE_EXPIRY_INDEX))
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_CREATE_UNIQUE_INDEX))
+        unique_index_ready = True
+    except IntegrityError:
+        unique_index_ready = False
+        logger.warning("oauth_tokens has duplicate wallet/provider rows; run `python token_maintenance.py compact`")
+    return unique_index_ready
+
+async def upsert_token(db: AsyncSession, wallet_address: str, provider: str, access_token: str,
+                       refresh_token: Optional[str], expires_at: Optional[datetime]) -> int:
+    """
+    Store the token for a wallet and provider, replacing the existing link if
+    there is one, and return its id. The id is stable across re-links, so the
+    token keeps its polling watermark and schedule, but not the refresh
+    backoff of the link it replaces. The address is stored in
+    checksum form, so differently cased spellings map to the same link;
+    ValueError if it is not a valid address.
+    """
+    wallet_address = normalize_wallet_address(wallet_address)
+    values = {
+        "wallet_address": wallet_address,
+        "provider": provider,
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "expires_at": expires_at,
+        "created_at": datetime.utcnow(),
+    }
+    dialect = db.bind.dialect.name
+    if unique_index_ready and dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(OAuthToken).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OAuthToken.wallet_address, OAuthToken.provider],
+            set_={
+                "access_token": stmt.excluded.access_token,
+                # Providers that do not rotate refresh tokens omit them on re-link
+                "refresh_token": func.coalesce(stmt.excluded.refresh_token, OAuthToken.refresh_token),
+                "expires_at": stmt.excluded.expires_at,
+            },
+        ).returning(OAuthToken.id)
+        token_id = (await db.execute(stmt)).scalar_one()
+        await _clear_refresh_state(db, token_id)
+        await db.commit()
+        return token_id
+
+    existing = (await db.execute(
+        select(OAuthToken).where(OAuthToken.wallet_address == wallet_address, OAuthToken.provider == provider)
+    )).scalars().first()
+    if existing is None:
+        existing = OAuthToken(**values)
+        db.add(existing)
+    else:
+        existing.access_token = access_token
+        existing.refresh_token = refresh_token or existing.refresh_token
+        existing.expires_at = expires_at
+    await db.flush()
+    await _clear_refresh_state(db, existing.id)
+    await db.commit()
+    return existing.id
+
+async def _clear_refresh_state(db: AsyncSession, token_id: int):
+    """A fresh link starts with no failed refreshes, so it is neither backed off nor purged as dead"""
+    await db.execute(delete(TokenRefreshState).where(TokenRefreshState.token_id == token_id))
+
+def _canonical_address(wallet_address: str) -> str:
+    """Checksum form of a stored address; rows that predate validation are left as they are"""
+    try:
+        return normalize_wallet_address(wallet_address)
+    except ValueError:
+        return wallet_address
+
+def _collapse_group(db, wallet_key: str, provider: str) -> int:
+    """
+    Keep the freshest token of one duplicate group (addresses compared
+    case-insensitively), store its address in checksum form and return the
+    number of rows removed
+    """
+    rows = db.execute(
+        select(OAuthToken.id, OAuthToken.wallet_address)
+        .where(func.lower(OAuthToken.wallet_address) == wallet_key, OAuthToken.provider == provider)
+        .order_by(OAuthToken.expires_at.desc().nulls_last(), OAuthToken.id.desc())
+    ).all()
+    ids = [row.id for row in rows]
+    keeper, duplicates = ids[0], ids[1:]
+    if not duplicates:
+        return 0
+
+    # Carry over the most advanced polling watermark so compaction does not cause resubmissions
+    best = db.execute(
+        select(PollWatermark.token_id)
+        .where(PollWatermark.token_id.in_(ids))
+        .order_by(PollWatermark.last_reading_at.desc())
+        .limit(1)
+    ).scalar()
+    if best is not None and best != keeper:
+        db.execute(delete(PollWatermark).where(PollWatermark.token_id == keeper))
+        db.execute(update(PollWatermark).where(PollWatermark.token_id == best).values(token_id=keeper))
+
+    db.execute(delete(PollWatermark).where(PollWatermark.token_id.in_(duplicates)))
+    db.execute(delete(PollSchedule).where(PollSchedule.token_id.in_(duplicates)))
+    db.execute(delete(TokenRefreshState).where(TokenRefreshState.token_id.in_(duplicates)))
+    db.execute(delete(OAuthToken).where(OAuthToken.id.in_(duplicates)))
+    db.execute(update(OAuthToken).where(OAuthToken.id == keeper)
+               .values(wallet_address=_canonical_address(rows[0].wallet_address)))
+    return len(duplicates)
+
+def _normalize_addresses(batch_size: int) -> int:
+    """Rewrite the remaining non-checksum addresses; returns the number of rows changed"""
+    changed, last_id = 0, 0
+    while True:
+        with SessionLocal() as db, db.begin():
+            rows = db.execute(
+                select(OAuthToken.id, OAuthToken.wallet_address)
+                .where(OAuthToken.id > last_id).order_by(OAuthToken.id).limit(batch_size)
+            ).all()
+            for row in rows:
+                canonical = _canonical_address(row.wallet_address)
+                if canonical != row.wallet_address:
+                    db.execute(update(OAuthToken).where(OAuthToken.id == row.id).values(wallet_address=canonical))
+                    changed += 1
+        if len(rows) < batch_size:
+            return changed
+        last_id = rows[-1].id
+
+def compact_duplicate_tokens(batch_size: int = 200) -> Dict[str, Any]:
+    """
+    One-off job: collapse duplicate (wallet_address, provider) rows to the
+    freshest token, then create the unique index that prevents new ones.
+    Addresses that differ only in case are duplicates too, and every address
+    is rewritten in checksum form, matching what upsert_token stores.
+    Groups are processed in small transactions to keep write locks short.
+    """
+    wallet_key = func.lower(OAuthToken.wallet_address)
+    with SessionLocal() as db:
+        groups: List[tuple] = db.execute(
+            select(wallet_key, OAuthToken.provider)
+            .group_by(wallet_key, OAuthToken.provider)
+            .having(func.count() > 1)
+        ).all()
+
+    removed = 0
+    for start in range(0, len(groups), batch_size):
+        with SessionLocal() as db, db.begin():
+            for wallet_address, provider in groups[start:start + batch_size]:
+                removed += _collapse_group(db, wallet_address, provider)
+        logger.info("Compacted %s of %s duplicate groups", min(start + batch_size, len(groups)), len(groups))
+
+    normalized = _normalize_addresses(batch_size)
+    ensure_token_indexes()
+    return {"duplicate_groups": len(groups), "rows_removed": removed, "addresses_normalized": normalized,
+            "unique_index": UNIQUE_INDEX}
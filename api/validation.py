@@ -1,58 +1,55 @@
-from pydantic import BaseModel, validator, Field
-from fastapi import HTTPException
+from pydantic import BaseModel, Field, field_validator
 from web3 import Web3
 import re
+from functools import lru_cache
 from typing import Dict, Any
 
-VALID_ACTIVITY_TYPES = {
-    "solar_export", "ev_charging", "energy_saving", "carbon_offset", 
+VALID_ACTIVITY_TYPES = frozenset({
+    "solar_export", "ev_charging", "energy_saving", "carbon_offset",
     "renewable_energy", "green_transport", "waste_reduction"
-}
+})
+
+MIN_ACTIVITY_VALUE = 0.0
+MAX_ACTIVITY_VALUE = 10000.0
+
+_WALLET_ADDRESS_RE = re.compile(r'(0[xX])?[0-9a-fA-F]{40}')
+
+@lru_cache(maxsize=4096)
+def _checksum_address(address: str) -> str:
+    """Checksum a pre-validated hex address (keccak is cached per address)"""
+    address = address.lower()
+    if not address.startswith('0x'):
+        address = '0x' + address
+    return Web3.to_checksum_address(address)
+
+def normalize_wallet_address(v: str) -> str:
+    """Checksummed form of a hex address, with or without 0x; raises ValueError otherwise"""
+    if not v:
+        raise ValueError('Wallet address is required')
+    if not _WALLET_ADDRESS_RE.fullmatch(v):
+        raise ValueError('Invalid Ethereum wallet address format')
+    return _checksum_address(v)
 
 class BaseActivitySubmission(BaseModel):
     wallet_address: str = Field(..., description="Ethereum wallet address")
     activity_type: str = Field(..., description="Type of green activity")
-    value: float = Field(..., ge=0.0, le=10000.0, description="Activity value in kWh (0-10000)")
+    value: float = Field(..., ge=MIN_ACTIVITY_VALUE, le=MAX_ACTIVITY_VALUE, description="Activity value in kWh (0-10000)")
     details: Dict[str, Any] = Field(default_factory=dict, description="Additional activity details")
-    
-    @validator('wallet_address')
-    def validate_wallet_address(cls, v):
-        if not v:
-            raise ValueError('Wallet address is required')
-        
-        address = v.lower()
-        if address.startswith('0x'):
-            address = address[2:]
-        
-        if not re.match(r'^[0-9a-f]{40}$', address):
-            raise ValueError('Invalid Ethereum wallet address format')
-        
-        normalized_address = '0x' + address if not v.startswith('0x') else v.lower()
-        return Web3.to_checksum_address(normalized_address)
-    
-    @validator('activity_type')
-    def validate_activity_type(cls, v):
+
+    @field_validator('wallet_address')
+    @classmethod
+    def validate_wallet_address(cls, v: str) -> str:
+        return normalize_wallet_address(v)
+
+    @field_validator('activity_type')
+    @classmethod
+    def validate_activity_type(cls, v: str) -> str:
         if v not in VALID_ACTIVITY_TYPES:
-            raise ValueError(f'Invalid activity type. Must be one of: {", ".join(VALID_ACTIVITY_TYPES)}')
+            raise ValueError(f'Invalid activity type. Must be one of: {", ".join(sorted(VALID_ACTIVITY_TYPES))}')
         return v
-    
-    @validator('value')
-    def validate_value(cls, v):
-        if v < 0:
-            raise ValueError('Activity value must be non-negative')
-        if v > 10000:
-            raise ValueError('Activity value cannot exceed 10000 kWh')
-        
-        return round(float(v), 2)
-
-def validate_activity_before_blockchain(activity: BaseActivitySubmission, endpoint_name: str):
-    """Explicit validation before blockchain interaction"""
-    if activity.value > 10000:
-        print(f"[{endpoint_name}] VALIDATION FAILED: Value {activity.value} exceeds 10000 kWh limit")
-        raise HTTPException(status_code=422, detail="Activity value cannot exceed 10000 kWh")
-    
-    if activity.value < 0:
-        print(f"[{endpoint_name}] VALIDATION FAILED: Value {activity.value} is negative")
-        raise HTTPException(status_code=422, detail="Activity value must be non-negative")
-        
-    print(f"[{endpoint_name}] VALIDATION PASSED: Value {activity.value} kWh is within limits")
+
+    @field_validator('value')
+    @classmethod
+    def round_value(cls, v: float) -> float:
+        # Range is enforced by the ge/le constraints, inside pydantic-core
+        return round(v, 2)
@@ -1,58 +1,42 @@
+import argparse
+import asyncio
+import json
+import logging
 import os
+import signal
 import sys
-from datetime import datetime
-from sqlalchemy.orm import Session
-import requests
 
-# Ensure api/ is importable
-sys.path.append(os.path.join(os.path.dirname(__file__), "api"))
-
-from database import SessionLocal
-from models.tokens import OAuthToken
-
-ACTIVITY_SUBMIT_URL = "https://silvanus-a4nt.onrender.com/activities/submit"
-
-def fetch_mock_solaredge_data(token: str):
-    # Placeholder for a real SolarEdge API call
-    return {
-        "kwh": 2.5,
-        "timestamp": datetime.utcnow().isoformat()
-    }
-
-def poll_all_tokens():
-    db: Session = SessionLocal()
-    tokens = db.query(OAuthToken).all()
-
-    for token in tokens:
-        if token.provider == "github":
-            print(f"Skipping GitHub token for wallet {token.wallet_address}")
-            continue
-
-        if not token.access_token:
-            print(f"Missing token for wallet {token.wallet_address}")
-            continue
-
-        try:
-            # Simulate fetching energy data
-            data = fetch_mock_solaredge_data(token.access_token)
-
-            # Submit activity to API
-            response = requests.post(ACTIVITY_SUBMIT_URL, json={
-                "wallet_address": token.wallet_address,
-                "kwh": data["kwh"],
-                "source": f"oauth:{token.provider}",
-                "timestamp": data["timestamp"]
-            })
-
-            if response.status_code == 200:
-                print(f"Submitted {data['kwh']} kWh for {token.wallet_address}")
-            else:
-                print(f"Failed to submit for {token.wallet_address}: {response.text}")
-
-        except Exception as e:
-            print(f"Polling error for {token.wallet_address}: {e}")
-
-    db.close()
+# Ensure the repository root is importable so `api` resolves as a package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.polling import poll_all_tokens, POLL_CONCURRENCY
+from api.poll_scheduler import run_poll_scheduler
+from api.http_client import close_async_client
+from api.database import dispose_async_engines
+
+async def run_forever(args):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        await run_poll_scheduler(stop, args.concurrency, sharded=args.sharded, worker_id=args.worker_id)
+    finally:
+        await close_async_client()
+        await dispose_async_engines()
 
 if __name__ == "__main__":
-    poll_all_tokens()
+    parser = argparse.ArgumentParser(description="Poll energy providers for every linked wallet")
+    parser.add_argument("--concurrency", type=int, default=POLL_CONCURRENCY)
+    parser.add_argument("--sharded", action="store_true",
+                        help="Only poll token shards leased by this worker, so several pollers can run side by side")
+    parser.add_argument("--worker-id", default=None, help="Lease owner name (defaults to host:pid)")
+    parser.add_argument("--forever", action="store_true",
+                        help="Keep running and poll tokens as they become due instead of a single pass")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.forever:
+        asyncio.run(run_forever(args))
+    else:
+        print(json.dumps(poll_all_tokens(args.concurrency, sharded=args.sharded, worker_id=args.worker_id), indent=2))
@@ -0,0 +1,91 @@
+"""
+Microbenchmark for activity submission validation throughput.
+
+Compares the previous v1-style ``@validator`` model against the current
+``api.validation.BaseActivitySubmission`` on the same payloads.
+
+Usage:
+    python python/bench_validation.py [iterations]
+"""
+import os
+import re
+import sys
+import time
+import warnings
+from typing import Any, Dict
+
+from pydantic import BaseModel, Field
+from web3 import Web3
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+
+from api.validation import BaseActivitySubmission, VALID_ACTIVITY_TYPES
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+    class LegacyActivitySubmission(BaseModel):
+        wallet_address: str = Field(..., description="Ethereum wallet address")
+        activity_type: str = Field(..., description="Type of green activity")
+        value: float = Field(..., ge=0.0, le=10000.0, description="Activity value in kWh (0-10000)")
+        details: Dict[str, Any] = Field(default_factory=dict, description="Additional activity details")
+
+        @validator('wallet_address')
+        def validate_wallet_address(cls, v):
+            if not v:
+                raise ValueError('Wallet address is required')
+            address = v.lower()
+            if address.startswith('0x'):
+                address = address[2:]
+            if not re.match(r'^[0-9a-f]{40}$', address):
+                raise ValueError('Invalid Ethereum wallet address format')
+            normalized_address = '0x' + address if not v.startswith('0x') else v.lower()
+            return Web3.to_checksum_address(normalized_address)
+
+        @validator('activity_type')
+        def validate_activity_type(cls, v):
+            if v not in VALID_ACTIVITY_TYPES:
+                raise ValueError('Invalid activity type')
+            return v
+
+        @validator('value')
+        def validate_value(cls, v):
+            if v < 0:
+                raise ValueError('Activity value must be non-negative')
+            if v > 10000:
+                raise ValueError('Activity value cannot exceed 10000 kWh')
+            return round(float(v), 2)
+
+PAYLOADS = [
+    {
+        "wallet_address": "0x" + format(i, "040x"),
+        "activity_type": "solar_export",
+        "value": 5.0 + i % 100,
+        "details": {"note": "benchmark", "host": "bench"},
+    }
+    for i in range(1, 101)
+]
+
+def bench(model, iterations: int) -> float:
+    """Return validated payloads per second"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for payload in PAYLOADS:
+            model.model_validate(payload)
+    elapsed = time.perf_counter() - start
+    return iterations * len(PAYLOADS) / elapsed
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    for payload in PAYLOADS:
+        assert LegacyActivitySubmission.model_validate(payload).model_dump() == \
+            BaseActivitySubmission.model_validate(payload).model_dump()
+
+    before = bench(LegacyActivitySubmission, iterations)
+    after = bench(BaseActivitySubmission, iterations)
+
+    print(f"legacy @validator model:   {before:>10,.0f} validations/s")
+    print(f"v2 core-constraint model:  {after:>10,.0f} validations/s")
+    print(f"speedup:                   {after / before:>10.2f}x")
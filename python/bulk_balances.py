@@ -0,0 +1,207 @@
+"""
+Bulk SVN balance and reward audit for many wallets.
+
+Reads addresses from a file (one per line, or the first column of a CSV) and
+fetches balanceOf from the Silvanus token plus pendingRewards and totalClaimed
+from GreenRewardDistributor. Calls are grouped through Multicall3 when it is
+deployed on the chain, otherwise sent as JSON-RPC batch requests, so N wallets
+cost a handful of round trips instead of N x 3.
+
+Usage:
+    python python/bulk_balances.py wallets.txt --out balances.csv
+    python python/bulk_balances.py wallets.csv --out balances.parquet --method batch
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from decimal import Context, Decimal
+from functools import lru_cache
+
+from dotenv import load_dotenv
+from eth_abi import decode, encode
+from web3 import Web3
+
+load_dotenv()
+
+# Same address on every chain that has it, Sepolia included
+MULTICALL3_ADDRESS = "0xcA11bde05977b3631167028862bE2a173976CA11"
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+# Per-wallet reads: (output column, contract, function); every one is f(address) -> uint256
+WALLET_CALLS = [
+    ("balance", "token", "balanceOf"),
+    ("pending_rewards", "distributor", "pendingRewards"),
+    ("total_claimed", "distributor", "totalClaimed"),
+]
+SELECTORS = {name: Web3.keccak(text=f"{name}(address)")[:4] for _, _, name in WALLET_CALLS}
+DECIMALS_SELECTOR = Web3.keccak(text="decimals()")[:4]
+
+MULTICALL_CHUNK = int(os.getenv("BULK_MULTICALL_CHUNK", "300"))  # wallets per aggregate3 call
+BATCH_CHUNK = int(os.getenv("BULK_RPC_BATCH_CHUNK", "100"))  # wallets per JSON-RPC batch
+# Enough digits for any uint256, so scaling to token units is exact
+_EXACT = Context(prec=100)
+
+def read_addresses(path):
+    """Checksummed, de-duplicated addresses in file order; invalid lines are reported and skipped"""
+    addresses, seen = [], set()
+    with open(path, newline="") as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            value = row[0].strip() if row else ""
+            if not value or value.startswith("#") or value.lower() == "address":
+                continue
+            if not Web3.is_address(value):
+                print(f"⚠️ Line {line_no}: not an address: {value}", file=sys.stderr)
+                continue
+            address = Web3.to_checksum_address(value)
+            if address not in seen:
+                seen.add(address)
+                addresses.append(address)
+    return addresses
+
+@lru_cache(maxsize=None)
+def token_decimals(w3, token_address):
+    """decimals() never changes, so it is read once per token"""
+    return decode(["uint8"], w3.eth.call({"to": token_address, "data": DECIMALS_SELECTOR}))[0]
+
+def _call_data(function_name, address):
+    return SELECTORS[function_name] + encode(["address"], [address])
+
+def _decode_uint(success, data):
+    return decode(["uint256"], data)[0] if success and len(data) == 32 else None
+
+def _multicall_chunk(multicall, targets, addresses):
+    calls = [
+        (targets[contract], True, _call_data(function_name, address))
+        for address in addresses
+        for _, contract, function_name in WALLET_CALLS
+    ]
+    results = multicall.functions.aggregate3(calls).call()
+    per_wallet = len(WALLET_CALLS)
+    return [
+        [_decode_uint(success, data) for success, data in results[i * per_wallet:(i + 1) * per_wallet]]
+        for i in range(len(addresses))
+    ]
+
+def _batch_chunk(w3, targets, addresses):
+    # The provider's raw batch keeps a revert in one call from failing the whole batch
+    requests = [
+        ("eth_call", [{"to": targets[contract], "data": "0x" + _call_data(function_name, address).hex()}, "latest"])
+        for address in addresses
+        for _, contract, function_name in WALLET_CALLS
+    ]
+    responses = w3.provider.make_batch_request(requests)
+    if not isinstance(responses, list):
+        raise RuntimeError(f"JSON-RPC batch rejected: {responses.get('error')}")
+    results = [
+        _decode_uint("error" not in response, bytes.fromhex(response.get("result", "0x")[2:]))
+        for response in responses
+    ]
+    per_wallet = len(WALLET_CALLS)
+    return [results[i * per_wallet:(i + 1) * per_wallet] for i in range(len(addresses))]
+
+def has_multicall(w3):
+    return len(w3.eth.get_code(MULTICALL3_ADDRESS)) > 0
+
+def fetch_balances(w3, addresses, token_address, distributor_address, method="auto"):
+    """
+    Rows of address plus raw (wei) and decimal values for every WALLET_CALLS
+    read. A read that reverts comes back as None. method is "multicall",
+    "batch" or "auto" (Multicall3 if deployed, otherwise batch).
+    """
+    if method == "auto":
+        method = "multicall" if has_multicall(w3) else "batch"
+    targets = {"token": token_address, "distributor": distributor_address}
+    decimals = token_decimals(w3, token_address)
+
+    if method == "multicall":
+        multicall = w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        chunk_size, fetch = MULTICALL_CHUNK, lambda chunk: _multicall_chunk(multicall, targets, chunk)
+    else:
+        chunk_size, fetch = BATCH_CHUNK, lambda chunk: _batch_chunk(w3, targets, chunk)
+
+    rows = []
+    for start in range(0, len(addresses), chunk_size):
+        chunk = addresses[start:start + chunk_size]
+        for address, values in zip(chunk, fetch(chunk)):
+            row = {"address": address}
+            for (column, _, _), value in zip(WALLET_CALLS, values):
+                row[f"{column}_wei"] = value
+                row[column] = Decimal(value).scaleb(-decimals, _EXACT) if value is not None else None
+            rows.append(row)
+    return rows
+
+def write_rows(rows, path):
+    """CSV, or Parquet for .parquet paths (needs pyarrow); amounts are exact decimal strings"""
+    columns = ["address"] + [name for column, _, _ in WALLET_CALLS for name in (column, f"{column}_wei")]
+    rows = [
+        {column: f"{value:f}" if isinstance(value, Decimal) else value for column, value in row.items()}
+        for row in rows
+    ]
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing .parquet requires the 'pyarrow' package; use a .csv path instead")
+        table = pa.table({
+            column: [None if row[column] is None else str(row[column]) for row in rows] for column in columns
+        })
+        pq.write_table(table, path)
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch SVN balances and distributor rewards for many wallets")
+    parser.add_argument("addresses", help="File with one address per line (or a CSV whose first column is the address)")
+    parser.add_argument("--out", default="balances.csv", help=".csv or .parquet")
+    parser.add_argument("--method", choices=["auto", "multicall", "batch"], default="auto")
+    parser.add_argument("--token", default=os.getenv("TOKEN_ADDRESS"))
+    parser.add_argument("--distributor", default=os.getenv("REWARD_CONTRACT"))
+    args = parser.parse_args()
+
+    if not args.token or not args.distributor:
+        parser.error("set TOKEN_ADDRESS and REWARD_CONTRACT, or pass --token and --distributor")
+
+    w3 = Web3(Web3.HTTPProvider(os.getenv("SEPOLIA_RPC_URL")))
+    addresses = read_addresses(args.addresses)
+    started = time.perf_counter()
+    rows = fetch_balances(w3, addresses, Web3.to_checksum_address(args.token),
+                          Web3.to_checksum_address(args.distributor), args.method)
+    write_rows(rows, args.out)
+    total = sum((row["balance"] for row in rows if row["balance"] is not None), Decimal(0))
+    print(f"Fetched {len(rows)} wallets in {time.perf_counter() - started:.2f}s "
+          f"(total balance {total:.4f} SVN) -> {args.out}")
@@ -1,26 +1,28 @@
+import argparse
+import heapq
+import json
 import time
 import random
 import os
+import queue
 import threading
+from collections import Counter
+import requests
 from web3 import Web3
+from web3.exceptions import TransactionNotFound
 from dotenv import load_dotenv
-from eth_utils import to_wei
 
 # Load environment variables
 load_dotenv()
-wallets = [addr.strip() for addr in os.getenv("WALLET_ADDRESSES", "").split(",") if addr.strip()]
-print("Loaded wallets:", wallets)
 
-if not wallets:
-    print("🚫 No wallet addresses found in .env. Exiting.")
-    exit()
-
-print("Starting reward loop... parallelized across all wallets every 3 seconds")
-
-# Setup Web3
-w3 = Web3(Web3.HTTPProvider(os.getenv("SEPOLIA_RPC_URL")))
-PRIVATE_KEY = os.getenv("PRIVATE_KEY")
-REWARD_CONTRACT = os.getenv("REWARD_CONTRACT")
+TICK_SECONDS = float(os.getenv("EV_STREAM_TICK_SECONDS", "3"))
+# Sender threads that sign and broadcast; receipts are confirmed by a single tracker thread
+SENDER_WORKERS = int(os.getenv("EV_STREAM_WORKERS", "8"))
+QUEUE_SIZE = int(os.getenv("EV_STREAM_QUEUE_SIZE", "10000"))
+RECEIPT_POLL_SECONDS = float(os.getenv("EV_STREAM_RECEIPT_POLL_SECONDS", "2"))
+RECEIPT_TIMEOUT = float(os.getenv("EV_STREAM_RECEIPT_TIMEOUT", "300"))
+VERBOSE = os.getenv("EV_STREAM_VERBOSE", "true").lower() in ("1", "true", "yes")
+GAS_LIMIT = 150000
 
 # Smart contract ABI
 ABI = [
@@ -36,22 +38,14 @@ ABI = [
     }
 ]
 
-# Contract and account setup
-contract = w3.eth.contract(address=REWARD_CONTRACT, abi=ABI)
-account = w3.eth.account.from_key(PRIVATE_KEY)
-
-# Activity scoring system
+# Activity scoring system; api_type is the activity_type used when load testing the HTTP API
 ACTIVITIES = [
-    {"type": "EV miles driven", "min": 5, "max": 25, "score_per_unit": 1},
-    {"type": "Public transit rides", "min": 0, "max": 2, "score_per_unit": 10},
-    {"type": "Bike rides", "min": 0, "max": 3, "score_per_unit": 15},
-    {"type": "Solar charging sessions", "min": 0, "max": 1, "score_per_unit": 50}
+    {"type": "EV miles driven", "min": 5, "max": 25, "score_per_unit": 1, "api_type": "green_transport"},
+    {"type": "Public transit rides", "min": 0, "max": 2, "score_per_unit": 10, "api_type": "green_transport"},
+    {"type": "Bike rides", "min": 0, "max": 3, "score_per_unit": 15, "api_type": "green_transport"},
+    {"type": "Solar charging sessions", "min": 0, "max": 1, "score_per_unit": 50, "api_type": "ev_charging"}
 ]
 
-# Nonce management for parallelism
-nonce_lock = threading.Lock()
-current_nonce = w3.eth.get_transaction_count(account.address, 'pending')
-
 def simulate_green_activity(user):
     activity_data = []
     total_score = 0
@@ -69,50 +63,531 @@ def simulate_green_activity(user):
         "timestamp": int(time.time())
     }
 
-def reward_user(user, score):
-    global current_nonce
+# Node errors meaning our local nonce counter disagrees with the chain
+NONCE_ERRORS = ("nonce", "replacement transaction underpriced", "already known", "known transaction")
+
+def is_nonce_error(error):
+    message = str(error).lower()
+    return any(fragment in message for fragment in NONCE_ERRORS)
+
+class RewardSender:
+    """
+    Builds, signs and broadcasts reward transactions from one account. Nonces
+    are handed out locally so any number of sender threads can share it, and
+    chain id and gas price are cached instead of fetched for every transaction.
+    """
+
+    def __init__(self, w3, contract, account):
+        self.w3 = w3
+        self.contract = contract
+        self.account = account
+        self.chain_id = w3.eth.chain_id
+        self.gas_price = w3.eth.gas_price
+        self._cond = threading.Condition()
+        self._nonce = w3.eth.get_transaction_count(account.address, 'pending')
+        # Nonces handed out whose broadcast failed; reused first so they do not leave a gap
+        self._returned = []
+        self._in_flight = 0
+        self._resyncing = False
+
+    def refresh_gas_price(self):
+        self.gas_price = self.w3.eth.gas_price
+
+    def _take_nonce(self):
+        with self._cond:
+            while self._resyncing:
+                self._cond.wait()
+            self._in_flight += 1
+            if self._returned:
+                return heapq.heappop(self._returned)
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    def _finish(self, unused_nonce=None):
+        with self._cond:
+            self._in_flight -= 1
+            if unused_nonce is not None:
+                heapq.heappush(self._returned, unused_nonce)
+            self._cond.notify_all()
+
+    def resync_nonce(self):
+        """
+        Re-read the next nonce from the node after it rejected one. New sends
+        wait, and the re-read happens only once the sends already in flight
+        have finished, so nonces they hold are never handed out again.
+        """
+        with self._cond:
+            if self._resyncing:
+                # Another sender hit the same problem and is already resyncing
+                while self._resyncing:
+                    self._cond.wait()
+                return
+            self._resyncing = True
+            try:
+                while self._in_flight:
+                    self._cond.wait()
+                self._nonce = self.w3.eth.get_transaction_count(self.account.address, 'pending')
+                self._returned.clear()
+            finally:
+                self._resyncing = False
+                self._cond.notify_all()
+
+    def send(self, user, score):
+        nonce = self._take_nonce()
+        try:
+            txn = self.contract.functions.reward(user, score).build_transaction({
+                "from": self.account.address,
+                "nonce": nonce,
+                "gas": GAS_LIMIT,
+                "gasPrice": self.gas_price,
+                "chainId": self.chain_id,
+            })
+            signed_txn = self.account.sign_transaction(txn)
+            tx_hash = self.w3.eth.send_raw_transaction(signed_txn.raw_transaction)
+        except Exception as e:
+            if is_nonce_error(e):
+                self._finish()
+                self.resync_nonce()
+            else:
+                # Not a nonce problem: the next send reuses this nonce. If the
+                # transaction did reach the node, that send gets a nonce error
+                # and resyncs.
+                self._finish(nonce)
+            raise
+        self._finish()
+        return tx_hash
+
+class ReceiptTracker:
+    """
+    Confirms every sent transaction from one thread. Pending hashes are checked
+    once per new block, and ones without a receipt after `timeout` are given up.
+    """
+
+    def __init__(self, w3, poll_seconds=RECEIPT_POLL_SECONDS, timeout=RECEIPT_TIMEOUT, on_result=None):
+        self.w3 = w3
+        self.poll_seconds = poll_seconds
+        self.timeout = timeout
+        # Called as on_result(info, status, receipt) with status "succeeded", "reverted" or "timeout"
+        self.on_result = on_result or (lambda info, status, receipt: None)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_block = None
+
+    def track(self, tx_hash, info):
+        with self._lock:
+            self._pending[tx_hash] = (time.monotonic(), info)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def check(self):
+        block = self.w3.eth.block_number
+        if block == self._last_block:
+            return
+        self._last_block = block
+
+        with self._lock:
+            pending = list(self._pending.items())
+        now = time.monotonic()
+        for tx_hash, (sent_at, info) in pending:
+            try:
+                receipt = self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                if now - sent_at < self.timeout:
+                    continue
+                receipt = None
+            with self._lock:
+                del self._pending[tx_hash]
+            if receipt is None:
+                self.on_result(info, "timeout", None)
+            else:
+                self.on_result(info, "succeeded" if receipt.status == 1 else "reverted", receipt)
+
+    def run(self, stop):
+        """Check until `stop` is set and nothing is left pending"""
+        while not (stop.is_set() and not self._pending):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Receipt check failed: {e}")
+            time.sleep(self.poll_seconds)
+
+def print_result(info, status, receipt):
+    if status == "succeeded":
+        print(f"✅ TX succeeded: {info['tx_hash']} | Score: {info['score']}")
+    elif status == "reverted":
+        print(f"❌ TX failed: {info['tx_hash']}")
+    else:
+        print(f"⌛ No receipt after {RECEIPT_TIMEOUT:.0f}s: {info['tx_hash']}")
+
+def sender_worker(work, sender, tracker):
+    while True:
+        data = work.get()
+        if data is None:
+            return
+        try:
+            tx_hash = sender.send(data["user"], data["score"])
+        except Exception as e:
+            print(f"❌ Error rewarding {data['user']}: {e}")
+            continue
+        tracker.track(tx_hash, {"user": data["user"], "score": data["score"], "tx_hash": tx_hash.hex()})
+
+def generate_activity(wallet, work):
+    data = simulate_green_activity(wallet)
+    if VERBOSE:
+        print(f"\n📡 Green Activity Report for {wallet} at {data['timestamp']}:")
+        for typ, count, score in data["activities"]:
+            print(f"   - {typ}: {count} (Score: {score})")
+
+    if data["score"] <= 0:
+        if VERBOSE:
+            print("🚫 No qualifying green activity — no reward.")
+        return
+    try:
+        work.put_nowait(data)
+    except queue.Full:
+        print(f"⚠️ Send queue full, skipping reward for {wallet}")
+
+def main():
+    wallets = [addr.strip() for addr in os.getenv("WALLET_ADDRESSES", "").split(",") if addr.strip()]
+    print("Loaded wallets:", wallets)
+
+    if not wallets:
+        print("🚫 No wallet addresses found in .env. Exiting.")
+        exit()
+
+    # Setup Web3
+    w3 = Web3(Web3.HTTPProvider(os.getenv("SEPOLIA_RPC_URL")))
+    contract = w3.eth.contract(address=os.getenv("REWARD_CONTRACT"), abi=ABI)
+    account = w3.eth.account.from_key(os.getenv("PRIVATE_KEY"))
+
+    sender = RewardSender(w3, contract, account)
+    tracker = ReceiptTracker(w3, on_result=print_result)
+    work = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+
+    workers = [threading.Thread(target=sender_worker, args=(work, sender, tracker), daemon=True)
+               for _ in range(SENDER_WORKERS)]
+    tracker_thread = threading.Thread(target=tracker.run, args=(stop,), daemon=True)
+    for t in [*workers, tracker_thread]:
+        t.start()
+
+    print(f"Starting reward loop... {len(wallets)} wallets every {TICK_SECONDS:g} seconds, {SENDER_WORKERS} senders")
+
+    # Main loop: generate on a fixed cadence; sending and confirming never hold it up
     try:
-        with nonce_lock:
-            nonce = current_nonce
-            current_nonce += 1
-
-        txn = contract.functions.reward(user, score).build_transaction({
-            "from": account.address,
-            "nonce": nonce,
-            "gas": 150000,
-            "gasPrice": w3.eth.gas_price
-        })
-
-        signed_txn = w3.eth.account.sign_transaction(txn, private_key=PRIVATE_KEY)
-        tx_hash = w3.eth.send_raw_transaction(signed_txn.raw_transaction)
-        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
-
-        if receipt.status == 1:
-            print(f"✅ TX succeeded: {tx_hash.hex()} | Score: {score}")
+        next_tick = time.monotonic()
+        while True:
+            try:
+                sender.refresh_gas_price()
+            except Exception as e:
+                print(f"⚠️ Could not refresh gas price: {e}")
+            for wallet in wallets:
+                generate_activity(wallet, work)
+            print(f"⏱️ queued: {work.qsize()} | awaiting receipts: {len(tracker)}")
+            next_tick += TICK_SECONDS
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        print("\nStopping... waiting for queued rewards and receipts")
+    finally:
+        for _ in workers:
+            work.put(None)
+        for t in workers:
+            t.join()
+        stop.set()
+        tracker_thread.join()
+
+# Load generation
+
+def percentiles(values):
+    """p50/p95/p99 (nearest rank), mean and max in milliseconds"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))]
+    return {
+        "p50": round(rank(50) * 1000, 1),
+        "p95": round(rank(95) * 1000, 1),
+        "p99": round(rank(99) * 1000, 1),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 1),
+        "max": round(ordered[-1] * 1000, 1),
+    }
+
+class LoadStats:
+    """Counters and latency samples shared by the generator, senders and receipt tracker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = Counter()
+        self.errors = Counter()
+        self.send_latencies = []
+        self.confirm_latencies = []
+
+    def count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def sent(self, latency):
+        with self._lock:
+            self.counts["sent"] += 1
+            self.send_latencies.append(latency)
+
+    def confirmed(self, latency):
+        with self._lock:
+            self.counts["confirmed"] += 1
+            self.confirm_latencies.append(latency)
+
+    def error(self, kind):
+        with self._lock:
+            self.errors[kind] += 1
+
+    def report(self, config, generation_seconds, total_seconds):
+        return {
+            "config": config,
+            "generation_seconds": round(generation_seconds, 3),
+            "total_seconds": round(total_seconds, 3),
+            "counts": dict(self.counts),
+            "send_tps": round(self.counts["sent"] / generation_seconds, 2) if generation_seconds else 0,
+            "confirm_tps": round(self.counts["confirmed"] / total_seconds, 2) if total_seconds else 0,
+            "latency_ms": {
+                "send": percentiles(self.send_latencies),
+                "confirm": percentiles(self.confirm_latencies),
+            },
+            "errors": dict(self.errors),
+        }
+
+def parse_mix(spec):
+    """'EV miles driven=3,Bike rides=1' -> weights in ACTIVITIES order; empty means an even mix"""
+    if not spec:
+        return [1.0] * len(ACTIVITIES)
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    unknown = set(weights) - {act["type"] for act in ACTIVITIES}
+    if unknown:
+        raise SystemExit(f"Unknown activity in --mix: {', '.join(sorted(unknown))}")
+    return [weights.get(act["type"], 0.0) for act in ACTIVITIES]
+
+def synthetic_wallets(count):
+    return [Web3.to_checksum_address(Web3.keccak(text=f"ev_stream:{i}")[-20:]) for i in range(count)]
+
+def load_event(rng, wallets, weights):
+    """One reward-worthy activity: a single activity type drawn from the mix, with at least one unit"""
+    act = rng.choices(ACTIVITIES, weights=weights)[0]
+    units = rng.randint(max(act["min"], 1), max(act["max"], 1))
+    return {"user": rng.choice(wallets), "activity": act, "units": units, "score": units * act["score_per_unit"]}
+
+def random_events(rng, wallets, weights):
+    while True:
+        yield load_event(rng, wallets, weights)
+
+def replay_events(columns):
+    """
+    Rewarded rows of a simulate_activity.py file in order. The API target
+    submits each row's highest-scoring activity; the chain target its total score.
+    """
+    import numpy as np
+    from simulate_activity import activity_column
+
+    scores = np.stack([columns[f"{activity_column(act)}_score"] for act in ACTIVITIES], axis=1)
+    dominant = scores.argmax(axis=1)
+    for i in np.flatnonzero(columns["score"] > 0):
+        act = ACTIVITIES[dominant[i]]
+        yield {
+            "user": Web3.to_checksum_address(str(columns["wallet"][i])),
+            "activity": act,
+            "units": int(columns[f"{activity_column(act)}_count"][i]),
+            "score": int(columns["score"][i]),
+        }
+
+class ChainTarget:
+    """Signs and broadcasts directly; confirm latency runs from broadcast to the receipt being seen"""
+
+    def __init__(self, stats, release):
+        w3 = Web3(Web3.HTTPProvider(os.getenv("SEPOLIA_RPC_URL")))
+        contract = w3.eth.contract(address=os.getenv("REWARD_CONTRACT"), abi=ABI)
+        self.stats = stats
+        self.release = release
+        self.sender = RewardSender(w3, contract, w3.eth.account.from_key(os.getenv("PRIVATE_KEY")))
+        self.tracker = ReceiptTracker(w3, on_result=self._on_receipt)
+
+    def _on_receipt(self, info, status, receipt):
+        if status == "succeeded":
+            self.stats.confirmed(time.monotonic() - info["sent_at"])
         else:
-            print(f"❌ TX failed: {tx_hash.hex()}")
+            self.stats.error(status)
+        self.release()
 
-    except Exception as e:
-        print(f"❌ Error rewarding {user}: {e}")
+    def send(self, event, scheduled_at):
+        try:
+            tx_hash = self.sender.send(event["user"], event["score"])
+        except Exception as e:
+            self.stats.error(type(e).__name__)
+            self.release()
+            return
+        now = time.monotonic()
+        self.stats.sent(now - scheduled_at)
+        self.tracker.track(tx_hash, {"sent_at": now})
 
-def process_wallet(wallet):
-    data = simulate_green_activity(wallet)
-    print(f"\n📡 Green Activity Report for {wallet} at {data['timestamp']}:")
-    for typ, count, score in data["activities"]:
-        print(f"   - {typ}: {count} (Score: {score})")
+class ApiTarget:
+    """Posts to the submit API; a "confirmed" response counts as confirmed, "pending" only as sent"""
+
+    def __init__(self, stats, release, url, api_key):
+        self.stats = stats
+        self.release = release
+        self.url = url
+        self.headers = {"X-API-Key": api_key} if api_key else {}
+        self._local = threading.local()
+        self.tracker = None
+
+    def send(self, event, scheduled_at):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        payload = {
+            "wallet_address": event["user"],
+            "activity_type": event["activity"]["api_type"],
+            "value": event["units"],
+            "details": {"source": "ev_stream", "activity": event["activity"]["type"]},
+        }
+        try:
+            response = session.post(self.url, json=payload, headers=self.headers, timeout=60)
+            latency = time.monotonic() - scheduled_at
+            if response.status_code >= 400:
+                self.stats.error(f"http_{response.status_code}")
+            else:
+                self.stats.sent(latency)
+                if response.json().get("status") == "confirmed":
+                    self.stats.confirmed(latency)
+        except Exception as e:
+            self.stats.error(type(e).__name__)
+        finally:
+            self.release()
+
+def load_worker(work, target):
+    while True:
+        item = work.get()
+        if item is None:
+            return
+        target.send(*item)
+
+def run_load(args):
+    weights = parse_mix(args.mix)
+    if args.from_file:
+        from simulate_activity import load_simulation
+        columns = load_simulation(args.from_file)
+        wallet_count = len(set(columns["wallet"]))
+        events = replay_events(columns)
+    else:
+        wallets = synthetic_wallets(args.wallets) if args.wallets else \
+            [addr.strip() for addr in os.getenv("WALLET_ADDRESSES", "").split(",") if addr.strip()]
+        if not wallets:
+            raise SystemExit("🚫 No wallets: set WALLET_ADDRESSES or pass --wallets N")
+        wallet_count = len(wallets)
+        events = random_events(random.Random(args.seed), wallets, weights)
 
-    if data["score"] > 0:
-        reward_user(wallet, data["score"])
+    stats = LoadStats()
+    # Concurrency mode caps transactions in flight (sent but not yet confirmed or failed)
+    in_flight = threading.BoundedSemaphore(args.concurrency) if args.concurrency else None
+    release = in_flight.release if in_flight else (lambda: None)
+    if args.target == "api":
+        target = ApiTarget(stats, release, args.api_url, args.api_key)
     else:
-        print("🚫 No qualifying green activity — no reward.")
+        target = ChainTarget(stats, release)
 
-# Main loop
-while True:
-    threads = []
-    for wallet in wallets:
-        t = threading.Thread(target=process_wallet, args=(wallet,))
+    workers_count = max(args.workers, args.concurrency or 0) if args.target == "api" else args.workers
+    work = queue.Queue(maxsize=QUEUE_SIZE)
+    stop = threading.Event()
+    workers = [threading.Thread(target=load_worker, args=(work, target), daemon=True) for _ in range(workers_count)]
+    tracker_thread = None
+    if target.tracker is not None:
+        tracker_thread = threading.Thread(target=target.tracker.run, args=(stop,), daemon=True)
+    for t in workers + ([tracker_thread] if tracker_thread is not None else []):
         t.start()
-        threads.append(t)
-    for t in threads:
+
+    print(f"Load test: {args.target}, {wallet_count} wallets, "
+          f"{f'{args.rate:g} tx/s' if args.rate else f'{args.concurrency} in flight'} for {args.duration:g}s")
+    start = time.monotonic()
+    deadline = start + args.duration
+    interval = 1 / args.rate if args.rate else 0
+    generated = 0
+    try:
+        while True:
+            # Rate mode: latency is measured from the intended send time, so a backlog shows up in it
+            scheduled_at = start + generated * interval if interval else time.monotonic()
+            if scheduled_at >= deadline:
+                break
+            if interval:
+                time.sleep(max(0.0, scheduled_at - time.monotonic()))
+            elif not in_flight.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                break
+            event = next(events, None)
+            if event is None:
+                print("Simulation file exhausted")
+                release()
+                break
+            generated += 1
+            stats.count("generated")
+            try:
+                work.put_nowait((event, scheduled_at))
+            except queue.Full:
+                stats.error("queue_full")
+                release()
+    except KeyboardInterrupt:
+        print("\nStopping early...")
+    generation_seconds = time.monotonic() - start
+
+    for _ in workers:
+        work.put(None)
+    for t in workers:
         t.join()
-    time.sleep(3)
+    stop.set()
+    if tracker_thread is not None:
+        tracker_thread.join()
+
+    config = {
+        "target": args.target,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "wallets": wallet_count,
+        "from_file": args.from_file,
+        "workers": workers_count,
+        "mix": None if args.from_file else {act["type"]: weight for act, weight in zip(ACTIVITIES, weights)},
+        "seed": args.seed,
+    }
+    report = stats.report(config, generation_seconds, time.monotonic() - start)
+    print(json.dumps(report, indent=2))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.report}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate green activity and reward it, continuously or as a load test")
+    parser.add_argument("--load", action="store_true", help="Run a timed load test and print a JSON report")
+    parser.add_argument("--target", choices=["chain", "api"], default="chain",
+                        help="Send reward transactions directly, or POST activities to the submit API")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--rate", type=float, help="Target transactions per second (open loop)")
+    pace.add_argument("--concurrency", type=int, help="Transactions in flight at once (closed loop)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to generate load for")
+    parser.add_argument("--wallets", type=int, default=0, help="Use N synthetic wallets instead of WALLET_ADDRESSES")
+    parser.add_argument("--mix", default="", help="Activity weights, e.g. 'EV miles driven=3,Bike rides=1'")
+    parser.add_argument("--from-file", help="Replay rewarded rows from a simulate_activity.py output file instead")
+    parser.add_argument("--workers", type=int, default=SENDER_WORKERS, help="Sender threads")
+    parser.add_argument("--api-url", default=os.getenv("EV_STREAM_API_URL", "http://localhost:8000/v2/activities/submit"))
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"))
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--report", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    if not args.load:
+        main()
+    else:
+        if not args.rate and not args.concurrency:
+            parser.error("--load needs --rate or --concurrency")
+        run_load(args)
@@ -0,0 +1,313 @@
+"""
+Incremental indexer for GreenRewardDistributor RewardIssued and SVNPresale
+TokensPurchased events.
+
+Follows both contracts with eth_getLogs in adaptively sized block ranges, stays
+CONFIRMATIONS blocks behind the head, and rolls back if a checkpointed block
+was reorged out. Events are bulk-inserted into a local SQLite database so
+analytics never touch the RPC node.
+
+Usage:
+    python python/event_indexer.py --from-block 5200000          # catch up once
+    python python/event_indexer.py --follow                      # keep following the chain
+    python python/event_indexer.py --stats 0xWallet              # query the index
+"""
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from dotenv import load_dotenv
+from eth_abi import decode
+from web3 import Web3
+
+load_dotenv()
+
+EVENT_INDEX_DB = os.getenv("EVENT_INDEX_DB", "./events.db")
+EVENT_INDEX_START_BLOCK = int(os.getenv("EVENT_INDEX_START_BLOCK", "0"))
+# Blocks this close to the head are not indexed yet; reorgs deeper than this are rolled back
+CONFIRMATIONS = int(os.getenv("EVENT_INDEX_CONFIRMATIONS", "12"))
+INITIAL_RANGE = int(os.getenv("EVENT_INDEX_INITIAL_RANGE", "2000"))
+MAX_RANGE = int(os.getenv("EVENT_INDEX_MAX_RANGE", "50000"))
+# Shrink the range when a single response carries more logs than this
+TARGET_LOGS = int(os.getenv("EVENT_INDEX_TARGET_LOGS", "5000"))
+CHECKPOINTS_KEPT = 256
+# Transient RPC failures (timeouts, 5xx) are retried this many times before the run gives up
+RPC_RETRIES = int(os.getenv("EVENT_INDEX_RPC_RETRIES", "3"))
+# How providers word "this eth_getLogs request is too big"; only these shrink the range
+RANGE_ERRORS = (
+    "-32005", "block range", "range too large", "too many", "more than", "limit exceeded",
+    "response size", "exceed maximum",
+)
+# Silvanus and ETH both use 18 decimals
+DECIMALS = 18
+
+REWARD_ISSUED = Web3.keccak(text="RewardIssued(address,uint256,uint256)")
+TOKENS_PURCHASED = Web3.keccak(text="TokensPurchased(address,uint256,uint256)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reward_events (
+    block_number INTEGER NOT NULL,
+    block_time INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    user TEXT NOT NULL,
+    score TEXT NOT NULL,
+    reward_wei TEXT NOT NULL,
+    reward REAL NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS ix_reward_events_user ON reward_events (user, block_number);
+CREATE INDEX IF NOT EXISTS ix_reward_events_block ON reward_events (block_number);
+CREATE INDEX IF NOT EXISTS ix_reward_events_time ON reward_events (block_time);
+
+CREATE TABLE IF NOT EXISTS purchase_events (
+    block_number INTEGER NOT NULL,
+    block_time INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    buyer TEXT NOT NULL,
+    amount_wei TEXT NOT NULL,
+    amount REAL NOT NULL,
+    cost_wei TEXT NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS ix_purchase_events_buyer ON purchase_events (buyer, block_number);
+CREATE INDEX IF NOT EXISTS ix_purchase_events_block ON purchase_events (block_number);
+
+-- Hash of the last block of every indexed range, newest CHECKPOINTS_KEPT only
+CREATE TABLE IF NOT EXISTS index_checkpoints (
+    block_number INTEGER PRIMARY KEY,
+    block_hash TEXT NOT NULL
+);
+"""
+
+def open_index(path=EVENT_INDEX_DB):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def _hex(value):
+    return value.hex() if isinstance(value, (bytes, bytearray)) else value
+
+def _decode_log(log, block_times):
+    topic = bytes(log["topics"][0])
+    account = Web3.to_checksum_address(bytes(log["topics"][1])[-20:])
+    first, second = decode(["uint256", "uint256"], bytes(log["data"]))
+    base = (log["blockNumber"], block_times[log["blockNumber"]], "0x" + _hex(log["transactionHash"]).removeprefix("0x"),
+            log["logIndex"], account)
+    if topic == REWARD_ISSUED:
+        return "reward", base + (str(first), str(second), second / 10 ** DECIMALS)
+    return "purchase", base + (str(first), first / 10 ** DECIMALS, str(second), second / 10 ** DECIMALS)
+
+class EventIndexer:
+    def __init__(self, w3, conn, distributor, presale=None, start_block=EVENT_INDEX_START_BLOCK,
+                 confirmations=CONFIRMATIONS):
+        self.w3 = w3
+        self.conn = conn
+        self.addresses = [address for address in (distributor, presale) if address]
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.range = INITIAL_RANGE
+        # Lowered whenever the provider rejects a range, so growth never walks back into the rejection
+        self.range_ceiling = MAX_RANGE
+
+    def cursor(self):
+        """Last indexed block, or start_block - 1 before the first run"""
+        row = self.conn.execute("SELECT MAX(block_number) FROM index_checkpoints").fetchone()
+        return row[0] if row[0] is not None else self.start_block - 1
+
+    def _rollback_reorg(self):
+        """Drop everything above the newest checkpoint that is still on the canonical chain"""
+        checkpoints = self.conn.execute(
+            "SELECT block_number, block_hash FROM index_checkpoints ORDER BY block_number DESC"
+        ).fetchall()
+        if not checkpoints:
+            return
+        for number, block_hash in checkpoints:
+            if "0x" + _hex(self.w3.eth.get_block(number)["hash"]).removeprefix("0x") == block_hash:
+                break
+        else:
+            number = self.start_block - 1
+        if number == checkpoints[0][0]:
+            return
+        print(f"⚠️ Reorg detected, rolling back to block {number}")
+        with self.conn:
+            self.conn.execute("DELETE FROM reward_events WHERE block_number > ?", (number,))
+            self.conn.execute("DELETE FROM purchase_events WHERE block_number > ?", (number,))
+            self.conn.execute("DELETE FROM index_checkpoints WHERE block_number > ?", (number,))
+
+    def _get_logs(self, from_block, to_block):
+        """eth_getLogs with retries for transient errors; range-limit errors are raised at once"""
+        for attempt in range(RPC_RETRIES + 1):
+            try:
+                return self.w3.eth.get_logs({
+                    "fromBlock": from_block,
+                    "toBlock": to_block,
+                    "address": self.addresses,
+                    "topics": [[REWARD_ISSUED, TOKENS_PURCHASED]],
+                })
+            except Exception as e:
+                if is_range_error(e) or attempt == RPC_RETRIES:
+                    raise
+                print(f"⚠️ eth_getLogs {from_block}-{to_block} failed ({e}); retrying")
+                time.sleep(2 ** attempt)
+
+    def _block_times(self, logs):
+        """Timestamps for the blocks that have events, one JSON-RPC batch for all of them"""
+        times = {log["blockNumber"]: log["blockTimestamp"] for log in logs if log.get("blockTimestamp") is not None}
+        missing = sorted({log["blockNumber"] for log in logs} - set(times))
+        if missing:
+            responses = self.w3.provider.make_batch_request(
+                [("eth_getBlockByNumber", [hex(number), False]) for number in missing]
+            )
+            if not isinstance(responses, list):
+                raise RuntimeError(f"Block header batch rejected: {responses.get('error')}")
+            for number, response in zip(missing, responses):
+                times[number] = int(response["result"]["timestamp"], 16)
+        return {number: int(value, 16) if isinstance(value, str) else int(value) for number, value in times.items()}
+
+    def _store(self, logs, to_block, block_hash):
+        rows = {"reward": [], "purchase": []}
+        block_times = self._block_times(logs)
+        for log in logs:
+            if log.get("removed"):
+                continue
+            kind, row = _decode_log(log, block_times)
+            rows[kind].append(row)
+        # Events and the checkpoint commit together, so a crash never skips or double-counts a range
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO reward_events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows["reward"])
+            self.conn.executemany("INSERT OR IGNORE INTO purchase_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  rows["purchase"])
+            self.conn.execute("INSERT OR REPLACE INTO index_checkpoints VALUES (?, ?)", (to_block, block_hash))
+            self.conn.execute(
+                "DELETE FROM index_checkpoints WHERE block_number NOT IN "
+                "(SELECT block_number FROM index_checkpoints ORDER BY block_number DESC LIMIT ?)",
+                (CHECKPOINTS_KEPT,),
+            )
+        return len(rows["reward"]), len(rows["purchase"])
+
+    def run_once(self):
+        """Index every confirmed block past the cursor; returns (blocks, rewards, purchases) added"""
+        self._rollback_reorg()
+        safe_head = self.w3.eth.block_number - self.confirmations
+        start = self.cursor() + 1
+        from_block = start
+        rewards = purchases = 0
+        while from_block <= safe_head:
+            to_block = min(from_block + self.range - 1, safe_head)
+            try:
+                logs = self._get_logs(from_block, to_block)
+            except Exception as e:
+                # Providers cap range or result size with differing errors; halve until it fits.
+                # Anything else already had its retries and stops the run without touching the range.
+                if not is_range_error(e) or to_block == from_block:
+                    raise
+                self.range = self.range_ceiling = max(1, (to_block - from_block + 1) // 2)
+                print(f"↘️ eth_getLogs {from_block}-{to_block} failed ({e}); range now {self.range}")
+                continue
+
+            block_hash = "0x" + _hex(self.w3.eth.get_block(to_block)["hash"]).removeprefix("0x")
+            added = self._store(logs, to_block, block_hash)
+            rewards += added[0]
+            purchases += added[1]
+            if len(logs) > TARGET_LOGS:
+                self.range = max(1, self.range // 2)
+            elif len(logs) < TARGET_LOGS // 4:
+                self.range = min(self.range_ceiling, self.range * 2)
+            from_block = to_block + 1
+        return max(0, safe_head - start + 1), rewards, purchases
+
+    def follow(self, poll_seconds):
+        while True:
+            try:
+                blocks, rewards, purchases = self.run_once()
+            except Exception as e:
+                # Progress up to the failure is checkpointed; the next pass resumes from there
+                print(f"❌ Indexing pass failed: {e}")
+                time.sleep(poll_seconds)
+                continue
+            if blocks:
+                print(f"📥 Indexed {blocks} blocks: {rewards} rewards, {purchases} purchases (cursor {self.cursor()})")
+            time.sleep(poll_seconds)
+
+def is_range_error(error):
+    message = str(error).lower()
+    return any(fragment in message for fragment in RANGE_ERRORS)
+
+def wallet_stats(conn, address):
+    """
+    Everything the index knows about one wallet. In claim mode reward()
+    emits RewardIssued when it queues a reward and claimReward() emits it
+    again, with score 0, for the same tokens, so the two are summed apart.
+    """
+    address = Web3.to_checksum_address(address)
+    rewards = conn.execute(
+        "SELECT COUNT(*), "
+        "COALESCE(SUM(CASE WHEN score != '0' THEN reward END), 0), "
+        "COALESCE(SUM(CASE WHEN score = '0' THEN reward END), 0), "
+        "SUM(score != '0') "
+        "FROM reward_events WHERE user = ?",
+        (address,),
+    ).fetchone()
+    purchases = conn.execute(
+        "SELECT COUNT(*), COALESCE(SUM(amount), 0), COALESCE(SUM(cost), 0) FROM purchase_events WHERE buyer = ?",
+        (address,),
+    ).fetchone()
+    return {
+        "wallet": address,
+        "reward_events": rewards[0],
+        "green_events": rewards[3] or 0,
+        "earned_svn": rewards[1],  # sent or queued by reward()
+        "claimed_svn": rewards[2],  # queued rewards later paid out by claimReward()
+        "purchases": purchases[0],
+        "purchased_svn": purchases[1],
+        "spent_eth": purchases[2],
+    }
+
+def green_events_since(conn, since):
+    return conn.execute(
+        "SELECT COUNT(*) FROM reward_events WHERE block_time >= ? AND score != '0'", (int(since.timestamp()),)
+    ).fetchone()[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index RewardIssued and TokensPurchased events into SQLite")
+    parser.add_argument("--db", default=EVENT_INDEX_DB)
+    parser.add_argument("--from-block", type=int, default=EVENT_INDEX_START_BLOCK,
+                        help="Block to start from on the first run (the distributor's deployment block)")
+    parser.add_argument("--confirmations", type=int, default=CONFIRMATIONS)
+    parser.add_argument("--follow", action="store_true", help="Keep indexing new blocks")
+    parser.add_argument("--poll-seconds", type=float, default=12)
+    parser.add_argument("--stats", metavar="WALLET", help="Print what the index holds for a wallet and exit")
+    args = parser.parse_args()
+
+    conn = open_index(args.db)
+    if args.stats:
+        midnight = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        print({**wallet_stats(conn, args.stats), "green_events_today_all_wallets": green_events_since(conn, midnight)})
+        raise SystemExit()
+
+    distributor = os.getenv("REWARD_CONTRACT")
+    if not distributor:
+        parser.error("REWARD_CONTRACT is required")
+    presale = os.getenv("PRESALE_CONTRACT")
+    w3 = Web3(Web3.HTTPProvider(os.getenv("SEPOLIA_RPC_URL")))
+    indexer = EventIndexer(
+        w3, conn,
+        Web3.to_checksum_address(distributor),
+        Web3.to_checksum_address(presale) if presale else None,
+        start_block=args.from_block,
+        confirmations=args.confirmations,
+    )
+    try:
+        if args.follow:
+            indexer.follow(args.poll_seconds)
+        else:
+            blocks, rewards, purchases = indexer.run_once()
+            print(f"📥 Indexed {blocks} blocks: {rewards} rewards, {purchases} purchases (cursor {indexer.cursor()})")
+    except KeyboardInterrupt:
+        pass
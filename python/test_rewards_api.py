@@ -406,20 +406,37 @@ def test_oauth_token_storage():
     
     response = requests.get(f"{BASE_URL}/oauth/test/list-tokens")
     
+    print(f"→ Token listing without credentials: {response.status_code}")
+    
+    if response.status_code not in (401, 403):
+        print(f"   Token listing must require admin credentials: {response.text}")
+        return False
+    
+    admin_key = os.getenv("ADMIN_API_KEY")
+    if not admin_key:
+        print("   ⚠️ ADMIN_API_KEY not set, skipping token listing")
+        return True
+    
+    response = make_request("/oauth/test/list-tokens", api_key=admin_key)
+    
     print(f"→ Token listing: {response.status_code}")
     
     if response.status_code != 200:
         print(f"   Error: {response.text}")
         return False
     
-    tokens = response.json()
+    tokens = response.json().get("tokens")
     if not isinstance(tokens, list):
-        print(f"   Expected list, got: {type(tokens)}")
+        print(f"   Expected a page of tokens, got: {response.json()}")
+        return False
+    
+    if any("access_token" in token or "refresh_token" in token for token in tokens):
+        print("   Token listing must not expose credentials")
         return False
     
     print(f"   ✓ Token storage endpoint accessible")
     print(f"   ✓ Token listing endpoint accessible")
-    print(f"   ✓ Total tokens in storage: {len(tokens)}")
+    print(f"   ✓ Tokens on first page: {len(tokens)}")
     
     return True
 
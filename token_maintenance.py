@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+# Ensure the repository root is importable so `api` resolves as a package
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.token_store import compact_duplicate_tokens
+from api.token_refresh import refresh_expiring_tokens, TOKEN_REFRESH_CONCURRENCY
+from api.token_purge import run_token_purge, TOKEN_PURGE_BATCH_SIZE, TOKEN_PURGE_ARCHIVE, TOKEN_PURGE_VACUUM
+from api.http_client import close_async_client
+from api.database import dispose_async_engines
+
+async def run_refresh(concurrency: int):
+    # Importing the providers registers them with the refresher
+    from api.oauth import github, solaredge
+    try:
+        return await refresh_expiring_tokens(concurrency)
+    finally:
+        await close_async_client()
+        await dispose_async_engines()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintenance jobs for the oauth_tokens table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    compact = commands.add_parser("compact", help="Collapse duplicate wallet/provider links and add the unique index")
+    compact.add_argument("--batch-size", type=int, default=200)
+    refresh = commands.add_parser("refresh", help="Refresh tokens expiring within TOKEN_REFRESH_WINDOW once")
+    refresh.add_argument("--concurrency", type=int, default=TOKEN_REFRESH_CONCURRENCY)
+    purge = commands.add_parser("purge", help="Delete expired, unrefreshable tokens, then VACUUM/ANALYZE")
+    purge.add_argument("--batch-size", type=int, default=TOKEN_PURGE_BATCH_SIZE)
+    purge.add_argument("--no-archive", dest="archive", action="store_false", default=TOKEN_PURGE_ARCHIVE,
+                       help="Do not keep purged wallet links in oauth_tokens_archive")
+    purge.add_argument("--no-vacuum", dest="vacuum", action="store_false", default=TOKEN_PURGE_VACUUM,
+                       help="Only ANALYZE; skip VACUUM (SQLite VACUUM locks the database while it runs)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.command == "compact":
+        print(json.dumps(compact_duplicate_tokens(args.batch_size), indent=2))
+    elif args.command == "refresh":
+        print(json.dumps(asyncio.run(run_refresh(args.concurrency)).summary(), indent=2))
+    elif args.command == "purge":
+        # Importing the providers tells the purge which of them can still refresh
+        from api.oauth import github, solaredge
+        print(json.dumps(run_token_purge(args.batch_size, args.archive, args.vacuum), indent=2))